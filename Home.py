@@ -1,55 +1,28 @@
 import streamlit as st
-import requests
-from streamlit_lottie import st_lottie
+from utils.image_worker import get_image_worker
+from utils.llm import get_secret
+from utils.lottie import show_animation
+from utils.theme import apply_theme, page_title
 
 # --- Page Configuration ---
 st.set_page_config(page_title="AI Learning Hub", page_icon="🤖", layout="wide")
 
-# --- Custom CSS ---
-st.markdown("""
-<style>
-    @import url('https://fonts.googleapis.com/css2?family=Poppins:wght@300;400;600&display=swap');
-    .stApp {
-        background: linear-gradient(-45deg, #6a11cb, #2575fc, #ec008c, #fc6767);
-        background-size: 400% 400%;
-        animation: gradient 20s ease infinite;
-        font-family: 'Poppins', sans-serif;
-        color: white;
-    }
-    @keyframes gradient {
-        0% { background-position: 0% 50%; }
-        50% { background-position: 100% 50%; }
-        100% { background-position: 0% 50%; }
-    }
-    .stTitle {
-        font-weight: 600;
-        color: white;
-        text-shadow: 2px 2px 6px rgba(0,0,0,0.3);
-    }
-    .stMarkdown h3 {
-        color: #f1f1f1 !important;
-    }
-    .stMarkdown {
-        color: #e1e1e1;
-    }
-</style>
-""", unsafe_allow_html=True)
+# --- Theme ---
+apply_theme(
+    "#6a11cb, #2575fc, #ec008c, #fc6767", duration=20,
+    css=".stApp { color: white; } .stMarkdown { color: #e1e1e1; } .stMarkdown h3 { color: #f1f1f1 !important; }",
+)
 
-# --- Asset Loading ---
-@st.cache_data
-def load_lottieurl(url: str):
-    r = requests.get(url)
-    if r.status_code != 200:
-        return None
-    return r.json()
+# --- Background Warm-up ---
+# Start the image worker on the first visit so the diffusion model loads while people
+# browse; this returns immediately. Set IMAGE_WARMUP=0 on hosts without the image stack.
+if str(get_secret("IMAGE_WARMUP", "1")).lower() not in ("0", "false", "no", "off"):
+    get_image_worker()
 
-LOTTIE_URL = "https://lottie.host/e589f6d0-e923-43a0-8320-22c293339d37/jV59mET35j.json"
-lottie_json = load_lottieurl(LOTTIE_URL)
-if lottie_json:
-    st_lottie(lottie_json, speed=1, height=350, key="homepage_animation")
+show_animation("home", height=350, key="homepage_animation")
 
 # --- Main Page Content ---
-st.markdown('<h1 class="stTitle">Welcome to the AI+ Prompt Engineering Hub! 🤖</h1>', unsafe_allow_html=True)
+page_title("Welcome to the AI+ Prompt Engineering Hub! 🤖")
 st.markdown("""
 This is your one-stop platform for mastering the art and science of prompt engineering. Each module in the sidebar is a powerful tool designed to give you hands-on experience with cutting-edge AI.
 ### How to Get Started:
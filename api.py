@@ -0,0 +1,349 @@
+"""HTTP/JSON API for the Prompt Coach, Ethics Detector, Mini Project Builder and prompt chains.
+
+Run it next to the Streamlit app:
+
+    uvicorn api:app --host 0.0.0.0 --port 8000
+
+Endpoints call the same functions as the pages (the services package), so they share
+the model clients, the response cache and telemetry. The cache and telemetry are SQLite
+files, so a separate API process shares them with the UI. Provider rate limits are
+tracked per process, so give each process its share with <PROVIDER>_RPM / _TPM.
+
+Single-item endpoints answer with JSON, or with server-sent events (`event: token`
+per token, then `event: result`, or `event: error`) when the request asks for
+`text/event-stream` or passes `?stream=true`. The batch endpoints take up to
+API_MAX_BATCH items in one request. At most API_MAX_CONCURRENCY model calls run at
+once (each item of an ethics batch counts as one); up to API_MAX_QUEUED more requests
+wait, and beyond that requests get 429 with Retry-After. A streamed call whose client
+disconnects is stopped at its next token and keeps its slot until it has stopped. When API_TOKEN is set, requests need `Authorization: Bearer <token>`.
+Each client (X-Client-Id header, else its address) is queued as its own session by the
+request scheduler, so one busy client can't starve the others or the UI.
+"""
+import asyncio
+import dataclasses
+import hmac
+import json
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+
+from fastapi import Depends, FastAPI, HTTPException, Request
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
+
+from services import chain, coach, ethics, projects
+from utils.llm import get_secret
+from utils.request_context import set_page
+from utils.templates import TemplateError
+
+MAX_CONCURRENCY = int(get_secret("API_MAX_CONCURRENCY", 16))
+MAX_QUEUED = int(get_secret("API_MAX_QUEUED", 64))
+MAX_BATCH = int(get_secret("API_MAX_BATCH", 100))
+# Items of one ethics batch that run at once; each also takes a slot of `limit`.
+BATCH_CONCURRENCY = 8
+
+
+class ConcurrencyLimit:
+    """An asyncio semaphore that turns callers away once too many are already waiting."""
+
+    def __init__(self, limit, max_waiting):
+        self.limit = limit
+        self.max_waiting = max_waiting
+        self.active = 0
+        self.waiting = 0
+        self._semaphore = asyncio.Semaphore(limit)
+
+    def check(self):
+        """Raise 429 now if a new request would have to wait and the queue is full."""
+        if self.active >= self.limit and self.waiting >= self.max_waiting:
+            raise HTTPException(429, "Too many requests in flight. Please retry shortly.", headers={"Retry-After": "1"})
+
+    def reserve(self, check=True):
+        """A Reservation, counted as waiting from now on (so later `check`s see it)."""
+        if check:
+            self.check()
+        self.waiting += 1
+        return Reservation(self)
+
+
+class Reservation:
+    """One caller's place in a ConcurrencyLimit: waiting, then active, then released.
+
+    `release` is idempotent, so whichever cleanup path runs first frees the place.
+    """
+
+    def __init__(self, limit):
+        self._limit = limit
+        self.state = "waiting"
+
+    async def acquire(self):
+        try:
+            await self._limit._semaphore.acquire()
+        except BaseException:
+            self.release()
+            raise
+        self._limit.waiting -= 1
+        self._limit.active += 1
+        self.state = "active"
+
+    def release(self):
+        if self.state == "waiting":
+            self._limit.waiting -= 1
+        elif self.state == "active":
+            self._limit.active -= 1
+            self._limit._semaphore.release()
+        self.state = "released"
+
+    def drop_if_waiting(self):
+        if self.state == "waiting":
+            self.release()
+
+    async def __aenter__(self):
+        await self.acquire()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.release()
+
+
+limit = ConcurrencyLimit(MAX_CONCURRENCY, MAX_QUEUED)
+
+
+class ReservedStreamingResponse(StreamingResponse):
+    """Gives up the stream's reservation if the body never started (e.g. the client left first)."""
+
+    def __init__(self, content, reservation, **kwargs):
+        super().__init__(content, **kwargs)
+        self.reservation = reservation
+
+    async def __call__(self, scope, receive, send):
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            self.reservation.drop_if_waiting()
+
+
+@asynccontextmanager
+async def lifespan(app):
+    # Every call that blocks a thread here holds a slot of `limit` until its thread is
+    # done (chains and coach batches start their own threads), so this pool never queues.
+    executor = ThreadPoolExecutor(max_workers=MAX_CONCURRENCY + 4, thread_name_prefix="api")
+    asyncio.get_running_loop().set_default_executor(executor)
+    yield
+    executor.shutdown(wait=False)
+
+
+app = FastAPI(title="AI Innovation Hub API", lifespan=lifespan)
+
+
+def authorize(request: Request):
+    token = get_secret("API_TOKEN")
+    if not token:
+        return
+    scheme, _, supplied = request.headers.get("authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not hmac.compare_digest(supplied.encode(), str(token).encode()):
+        raise HTTPException(401, "Missing or invalid API token.", headers={"WWW-Authenticate": "Bearer"})
+
+
+def client_id(request: Request):
+    return request.headers.get("x-client-id") or (request.client.host if request.client else "anonymous")
+
+
+def wants_stream(request: Request):
+    return request.query_params.get("stream") in ("1", "true") or "text/event-stream" in request.headers.get("accept", "")
+
+
+def _event(name, data):
+    return f"event: {name}\ndata: {json.dumps(data)}\n\n"
+
+
+def stream_payload(result):
+    return dataclasses.asdict(result)
+
+
+async def respond(request, feature, call, stream, payload=stream_payload, token_payload=None):
+    """Run a service call as JSON or SSE, holding one concurrency slot while it runs.
+
+    `call` is a zero-argument coroutine function and `stream` builds the matching
+    TokenStream; `payload` turns the call's result into JSON.
+    """
+    reservation = limit.reserve()
+    session = client_id(request)
+    if wants_stream(request):
+        async def events():
+            # Attributed here too: the body is produced after the endpoint has returned.
+            set_page(f"API: {feature}", session=session)
+            tokens = None
+            try:
+                await reservation.acquire()
+                tokens = stream()
+                async for item in tokens:
+                    yield _event("token", token_payload(item) if token_payload else {"text": item})
+                yield _event("result", payload(tokens.result))
+            except Exception as e:
+                yield _event("error", {"detail": str(e) if isinstance(e, ValueError) else f"{type(e).__name__}: {e}"})
+            finally:
+                # Nothing is awaited here: after a disconnect this runs inside a cancelled
+                # scope. The call is told to stop and keeps its slot until its thread is done.
+                if tokens is None:
+                    reservation.release()
+                else:
+                    tokens.cancel()
+                    tokens.when_done(reservation.release)
+        return ReservedStreamingResponse(
+            events(), reservation, media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
+    set_page(f"API: {feature}", session=session)
+    async with reservation:
+        try:
+            result = await call()
+        except ValueError as e:
+            raise HTTPException(422, str(e))
+    return payload(result)
+
+
+async def gather_limited(calls):
+    """Await `calls` (coroutine functions) BATCH_CONCURRENCY at a time, each holding a slot of `limit`.
+
+    Per-item errors are returned, not raised.
+    """
+    semaphore = asyncio.Semaphore(BATCH_CONCURRENCY)
+
+    async def run(call):
+        async with semaphore, limit.reserve(check=False):
+            try:
+                return await call()
+            except Exception as e:
+                return e
+    return await asyncio.gather(*(run(call) for call in calls))
+
+
+# --- Request bodies ---
+class CoachRequest(BaseModel):
+    prompt: str = Field(min_length=1)
+
+
+class CoachBatchRequest(BaseModel):
+    prompts: list[str] = Field(min_length=1, max_length=MAX_BATCH)
+    max_concurrency: int = Field(8, ge=1, le=32)
+
+
+class EthicsRequest(BaseModel):
+    text: str = Field(min_length=1)
+
+
+class EthicsBatchRequest(BaseModel):
+    texts: list[str] = Field(min_length=1, max_length=MAX_BATCH)
+
+
+class ProjectRequest(BaseModel):
+    values: dict[str, str]
+
+
+class ChainStepModel(BaseModel):
+    prompt: str = Field(min_length=1)
+    inputs: list[int] = []
+
+
+class ChainRequest(BaseModel):
+    steps: list[ChainStepModel] = Field(min_length=1, max_length=MAX_BATCH)
+
+
+# --- Endpoints ---
+@app.get("/health")
+async def health():
+    return {"status": "ok", "active": limit.active, "waiting": limit.waiting}
+
+
+def coach_payload(result):
+    return {**stream_payload(result), "score": coach.parse_score(result.text)}
+
+
+@app.post("/coach/evaluate", dependencies=[Depends(authorize)])
+async def coach_evaluate(body: CoachRequest, request: Request):
+    return await respond(
+        request, "Prompt Coach",
+        lambda: coach.evaluate_async(body.prompt), lambda: coach.evaluate_stream(body.prompt), coach_payload,
+    )
+
+
+@app.post("/coach/batch", dependencies=[Depends(authorize)])
+async def coach_batch(body: CoachBatchRequest, request: Request):
+    """Grade many prompts, one model request each with up to `max_concurrency` in flight; results are in request order."""
+    prompts = dict(enumerate(body.prompts))
+
+    def payload(results):
+        return {"results": [
+            {"feedback": feedback, "score": coach.parse_score(feedback), "error": error}
+            for feedback, error in (results[i] for i in range(len(prompts)))
+        ]}
+    return await respond(
+        request, "Prompt Coach",
+        lambda: coach.evaluate_many_async(prompts, max_concurrency=body.max_concurrency),
+        lambda: coach.evaluate_many_stream(prompts, max_concurrency=body.max_concurrency),
+        payload,
+        # Streamed, each item is sent as soon as it is graded, in completion order.
+        token_payload=lambda item: {"index": item[0], "feedback": item[1], "score": coach.parse_score(item[1]), "error": item[2]},
+    )
+
+
+@app.post("/ethics/analyze", dependencies=[Depends(authorize)])
+async def ethics_analyze(body: EthicsRequest, request: Request):
+    return await respond(
+        request, "Ethics Detector",
+        lambda: ethics.analyze_async(body.text), lambda: ethics.analyze_stream(body.text),
+    )
+
+
+@app.post("/ethics/batch", dependencies=[Depends(authorize)])
+async def ethics_batch(body: EthicsBatchRequest, request: Request):
+    limit.check()
+    set_page("API: Ethics Detector", session=client_id(request))
+    results = await gather_limited([lambda text=text: ethics.analyze_async(text) for text in body.texts])
+    return {"results": [
+        {"error": f"{type(r).__name__}: {r}"} if isinstance(r, Exception) else stream_payload(r)
+        for r in results
+    ]}
+
+
+@app.get("/projects")
+async def project_list():
+    return {name: {"title": project.title, "fields": list(project.fields)} for name, project in projects.PROJECTS.items()}
+
+
+@app.post("/projects/{name}", dependencies=[Depends(authorize)])
+async def project_generate(name: str, body: ProjectRequest, request: Request):
+    if name not in projects.PROJECTS:
+        raise HTTPException(404, f"Unknown project: {name}")
+    try:
+        projects.build_prompt(name, body.values)
+    except TemplateError as e:
+        # Checked up front so a streamed request fails before the stream starts.
+        raise HTTPException(422, str(e))
+    return await respond(
+        request, "Mini Project Builder",
+        lambda: projects.generate_async(name, body.values), lambda: projects.generate_stream(name, body.values),
+    )
+
+
+def chain_payload(run):
+    return {
+        "steps": [None if r is None else dataclasses.asdict(r) for r in run.results],
+        "duration": run.duration,
+        "tokens": run.tokens,
+    }
+
+
+@app.post("/chain", dependencies=[Depends(authorize)])
+async def chain_execute(body: ChainRequest, request: Request):
+    """Run a prompt chain; steps list the indices of the earlier steps whose outputs they use."""
+    steps = [step.model_dump() for step in body.steps]
+    try:
+        chain.validate_chain(chain.as_steps(steps))
+    except ValueError as e:
+        raise HTTPException(422, str(e))
+    return await respond(
+        request, "Collaboration Hub",
+        lambda: chain.execute_async(steps), lambda: chain.execute_stream(steps), chain_payload,
+        token_payload=lambda item: {"step": item[0], "text": item[1]},
+    )
@@ -0,0 +1,72 @@
+import streamlit as st
+import time
+from collections import Counter
+from utils.llm import get_secret
+from utils.telemetry import get_telemetry_store, summarize
+from utils.theme import apply_theme, page_title
+
+# --- Page Configuration ---
+st.set_page_config(page_title="LLM Telemetry", page_icon="📈", layout="wide")
+
+# --- Theme ---
+apply_theme("#232526, #414345, #2c3e50, #1c1c1c")
+
+page_title("📈 LLM Telemetry", "Latency, token spend and errors for every model call, by page and model.")
+
+# --- Access ---
+# Set ADMIN_PASSWORD to keep this page to maintainers.
+admin_password = get_secret("ADMIN_PASSWORD")
+if admin_password and not st.session_state.get('telemetry_unlocked'):
+    entered = st.text_input("Admin password:", type="password")
+    if entered != admin_password:
+        if entered:
+            st.error("Incorrect password.")
+        st.stop()
+    st.session_state['telemetry_unlocked'] = True
+
+store = get_telemetry_store()
+windows = {"Last hour": 3600, "Last 24 hours": 24 * 3600, "Last 7 days": 7 * 24 * 3600, "All time": None}
+window = st.selectbox("Time window:", list(windows))
+since = time.time() - windows[window] if windows[window] else None
+records = store.load(since=since)
+
+if not records:
+    st.info("No model calls recorded in this window yet.")
+    st.stop()
+
+errors = [record for record in records if record.error]
+costs = [record.cost for record in records if record.cost is not None]
+total_col, error_col, token_col, cost_col = st.columns(4)
+total_col.metric("Calls", f"{len(records):,}")
+error_col.metric("Error rate", f"{len(errors) / len(records):.1%}")
+token_col.metric("Tokens", f"{sum((r.input_tokens or 0) + (r.output_tokens or 0) for r in records):,}")
+cost_col.metric("Est. spend", f"${sum(costs):,.2f}" if costs else "n/a")
+
+st.subheader("By page and model")
+st.dataframe(summarize(records), hide_index=True, use_container_width=True, column_config={
+    column: st.column_config.NumberColumn(format="%.2f")
+    for column in ("p50 (s)", "p95 (s)", "p99 (s)", "p50 TTFT (s)")
+} | {"Est. cost ($)": st.column_config.NumberColumn(format="$%.4f")})
+
+if errors:
+    st.subheader("Errors")
+    st.dataframe(
+        [{"Error": error, "Calls": count} for error, count in Counter(record.error for record in errors).most_common()],
+        hide_index=True,
+    )
+
+st.subheader("Live (this server process)")
+st.caption(f"The most recent {len(store.recent)} calls held in memory, newest first.")
+st.dataframe([
+    {
+        "Time": time.strftime("%H:%M:%S", time.localtime(record.started_at)),
+        "Page": record.page,
+        "Model": record.model,
+        "Latency (s)": round(record.latency, 2),
+        "TTFT (s)": round(record.ttft, 2) if record.ttft is not None else None,
+        "Tokens in": record.input_tokens,
+        "Tokens out": record.output_tokens,
+        "Error": record.error,
+    }
+    for record in list(store.recent)[::-1][:200]
+], hide_index=True, use_container_width=True)
@@ -1,130 +1,49 @@
 import streamlit as st
-import requests
-from streamlit_lottie import st_lottie
-from langchain_openai import ChatOpenAI
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain_anthropic import ChatAnthropic
+import contextvars
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from services.aio import StreamCancelled
+from utils.llm import get_llm, is_configured
+from utils.streaming import CURSOR, as_card, stream_llm
+from utils.lottie import show_animation
+from utils.theme import apply_theme, page_title
+from utils.request_context import set_page
 
 # --- Page Configuration ---
 st.set_page_config(page_title="AI Prompt Playground", page_icon="🚀", layout="wide")
+set_page("Prompt Playground")
 
-# --- Custom CSS for Advanced UI ---
-st.markdown("""
-<style>
-    /* Import Google Font */
-    @import url('https://fonts.googleapis.com/css2?family=Poppins:wght@300;400;600&display=swap');
+# --- Theme ---
+apply_theme("#ee7752, #e73c7e, #23a6d5, #23d5ab")
 
-    /* Animated Gradient Background */
-    .stApp {
-        background: linear-gradient(-45deg, #ee7752, #e73c7e, #23a6d5, #23d5ab);
-        background-size: 400% 400%;
-        animation: gradient 15s ease infinite;
-        font-family: 'Poppins', sans-serif;
-    }
 
-    @keyframes gradient {
-        0% { background-position: 0% 50%; }
-        50% { background-position: 100% 50%; }
-        100% { background-position: 0% 50%; }
-    }
 
-    /* Custom Title Style */
-    .stTitle {
-        font-weight: 600;
-        color: white;
-        text-shadow: 2px 2px 4px rgba(0,0,0,0.2);
-    }
-
-    /* Custom Text Area with Focus Effect */
-    .stTextArea textarea {
-        border-radius: 10px;
-        border: 2px solid rgba(255, 255, 255, 0.3);
-        background-color: rgba(255, 255, 255, 0.1);
-        color: white;
-        backdrop-filter: blur(10px);
-        transition: all 0.3s ease;
-        font-family: 'Poppins', sans-serif;
-    }
-
-    .stTextArea textarea:focus {
-        border-color: #ffffff;
-        box-shadow: 0 0 15px rgba(255, 255, 255, 0.5);
-    }
-    
-    /* Custom Button Style */
-    .stButton>button {
-        border-radius: 20px;
-        border: 1px solid #ffffff;
-        background-color: rgba(255, 255, 255, 0.2);
-        color: white;
-        font-weight: 600;
-        transition: all 0.3s ease;
-    }
-    
-    .stButton>button:hover {
-        background-color: rgba(255, 255, 255, 0.4);
-        border-color: #ffffff;
-        box-shadow: 0 0 15px rgba(255, 255, 255, 0.5);
-    }
-
-    /* Card for AI responses */
-    .response-card {
-        background: rgba(0, 0, 0, 0.2);
-        border-radius: 10px;
-        padding: 1.5rem;
-        margin-top: 1rem;
-        border: 1px solid rgba(255, 255, 255, 0.2);
-        backdrop-filter: blur(5px);
-        color: white;
-    }
-</style>
-""", unsafe_allow_html=True)
-
-
-# --- Asset Loading ---
-@st.cache_data
-def load_lottieurl(url: str):
-    r = requests.get(url)
-    if r.status_code != 200:
-        return None
-    return r.json()
-
-# This is a 3D animation of a rocket, as requested
-LOTTIE_URL = "https://lottie.host/b246995b-59e3-441a-85e8-4012581643c3/g6a5h2BAbp.json"
-
-
-# --- Model Initialization ---
-@st.cache_resource
-def get_models():
-    models = {}
-    try:
-        models["GPT-4o (OpenAI)"] = ChatOpenAI(api_key=st.secrets["OPENAI_API_KEY"], model_name="gpt-4o")
-    except Exception as e: st.warning(f"Could not load OpenAI model.")
-    try:
-        models["Gemini 1.5 Pro (Google)"] = ChatGoogleGenerativeAI(api_key=st.secrets["GOOGLE_API_KEY"], model="gemini-1.5-pro-latest")
-    except Exception as e: st.warning(f"Could not load Gemini model.")
+# --- Models ---
+# Clients are built when responses are requested, so the page renders before any SDK loads.
+PLAYGROUND_MODELS = {
+    "GPT-4o (OpenAI)": ("openai", "gpt-4o"),
+    "Gemini 1.5 Pro (Google)": ("google", "gemini-1.5-pro-latest"),
     # The Anthropic model is commented out as per our previous conversation
-    # try:
-    #     models["Claude 3 Sonnet (Anthropic)"] = ChatAnthropic(api_key=st.secrets["ANTHROPIC_API_KEY"], model_name="claude-3-sonnet-20240229")
-    # except Exception as e: st.warning(f"Could not load Claude model.")
-    return models
-
-models = get_models()
+    # "Claude 3 Sonnet (Anthropic)": ("anthropic", "claude-3-sonnet-20240229"),
+}
+available_models = [name for name, (provider, _) in PLAYGROUND_MODELS.items() if is_configured(provider)]
 
 
 # --- App Layout ---
-st.markdown('<h1 class="stTitle">🚀 AI Prompt Playground</h1>', unsafe_allow_html=True)
-st.markdown("<p style='color: white;'>Compare responses from different leading AI models side-by-side.</p>", unsafe_allow_html=True)
+page_title("🚀 AI Prompt Playground", "Compare responses from different leading AI models side-by-side.")
 
 col1, col2 = st.columns([0.6, 0.4])
 
 with col1:
     prompt = st.text_area("Enter your prompt here:", height=200, placeholder="e.g., Explain the theory of relativity in simple terms.")
     
-    if not models:
+    if not available_models:
         st.error("No AI models could be loaded. Please check your API keys.")
     else:
-        selected_models = st.multiselect("Choose models to compare:", options=list(models.keys()), default=list(models.keys()))
+        selected_models = st.multiselect("Choose models to compare:", options=available_models, default=available_models)
+        model_timeout = st.slider("Per-model timeout (seconds)", min_value=10, max_value=180, value=60, step=10)
 
         if st.button("Generate Responses", type="primary"):
             if not prompt:
@@ -134,16 +53,75 @@ with col1:
             else:
                 with st.spinner("The AIs are thinking..."):
                     cols_responses = st.columns(len(selected_models))
+                    placeholders, stats_placeholders = {}, {}
                     for i, model_name in enumerate(selected_models):
                         with cols_responses[i]:
                             st.markdown(f"### {model_name}")
+                            placeholders[model_name] = st.empty()
+                            placeholders[model_name].info("Waiting for response...")
+                            stats_placeholders[model_name] = st.empty()
+
+                    # Fan out to every selected model at once so the wait is the slowest model, not the sum.
+                    # Workers only talk to the providers and push tokens onto a queue; Streamlit calls stay on this thread.
+                    render_card = as_card()
+                    updates = queue.Queue()
+                    # Set when a model times out or the run is abandoned; its next token then
+                    # raises, which closes the provider stream instead of letting it run on.
+                    stops = {model_name: threading.Event() for model_name in selected_models}
+
+                    def run_model(model_name):
+                        # Building a client can fail (bad key, missing SDK); that shows as this model's error.
+                        llm = get_llm(*PLAYGROUND_MODELS[model_name])
+
+                        def on_token(token):
+                            if stops[model_name].is_set():
+                                raise StreamCancelled("The model was stopped.")
+                            updates.put((model_name, token))
+                        return stream_llm(llm, prompt, on_token=on_token)
+
+                    executor = ThreadPoolExecutor(max_workers=len(selected_models))
+                    # Copied contexts keep the calls attributed to this page in telemetry.
+                    futures = {executor.submit(contextvars.copy_context().run, run_model, model_name): model_name for model_name in selected_models}
+                    partial = {model_name: "" for model_name in selected_models}
+                    # All models start together, so one deadline is a per-model timeout.
+                    deadline = time.monotonic() + model_timeout
+                    pending = set(futures)
+                    finished = set()
+                    try:
+                        while pending and time.monotonic() < deadline:
+                            changed = set()
                             try:
-                                response = models[model_name].invoke(prompt)
-                                st.markdown(f'<div class="response-card">{response.content}</div>', unsafe_allow_html=True)
-                            except Exception as e:
-                                st.error(f"Error: Could not get response.")
+                                model_name, token = updates.get(timeout=0.1)
+                                partial[model_name] += token
+                                changed.add(model_name)
+                                while True:
+                                    model_name, token = updates.get_nowait()
+                                    partial[model_name] += token
+                                    changed.add(model_name)
+                            except queue.Empty:
+                                pass
+                            # Tokens can still be queued after a model's final card is drawn; they are already in its result.
+                            for model_name in changed - finished:
+                                render_card(placeholders[model_name], partial[model_name] + CURSOR)
+                            for future in [f for f in pending if f.done()]:
+                                pending.discard(future)
+                                model_name = futures[future]
+                                finished.add(model_name)
+                                try:
+                                    result = future.result()
+                                    render_card(placeholders[model_name], result.text)
+                                    stats_placeholders[model_name].caption(result.stats)
+                                except Exception as e:
+                                    placeholders[model_name].error(f"Error: Could not get response ({type(e).__name__}).")
+                        for future in pending:
+                            stops[futures[future]].set()
+                            future.cancel()
+                            placeholders[futures[future]].error(f"Timed out after {model_timeout} seconds.")
+                    finally:
+                        # Stop every model still streaming when we time out or the user reruns the script mid-flight.
+                        for stop in stops.values():
+                            stop.set()
+                        executor.shutdown(wait=False, cancel_futures=True)
 
 with col2:
-    lottie_json = load_lottieurl(LOTTIE_URL)
-    if lottie_json:
-        st_lottie(lottie_json, speed=1, height=400, key="playground_animation")
\ No newline at end of file
+    show_animation("playground", height=400, key="playground_animation")
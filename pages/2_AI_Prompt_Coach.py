@@ -1,68 +1,88 @@
 import streamlit as st
-import requests
-from streamlit_lottie import st_lottie
-from langchain_openai import ChatOpenAI
+import hashlib
+import time
+from functools import partial
+from services.coach import evaluate, evaluate_many, parse_score
+from utils.streaming import render_tokens
+from utils.theme import apply_theme, page_header
+from utils.request_context import set_page
 
 st.set_page_config(page_title="AI Prompt Coach", page_icon="👨‍🏫", layout="wide")
+set_page("Prompt Coach")
 
-# --- Custom CSS ---
-st.markdown("""
-<style>
-    @import url('https://fonts.googleapis.com/css2?family=Poppins:wght@300;400;600&display=swap');
-    .stApp {
-        background: linear-gradient(-45deg, #00c6ff, #0072ff, #3a7bd5, #00d2ff);
-        background-size: 400% 400%;
-        animation: gradient 15s ease infinite;
-        font-family: 'Poppins', sans-serif;
-    }
-    @keyframes gradient { 0% { background-position: 0% 50%; } 50% { background-position: 100% 50%; } 100% { background-position: 0% 50%; } }
-    .stTitle { font-weight: 600; color: white; text-shadow: 2px 2px 4px rgba(0,0,0,0.2); }
-    .stTextArea textarea { border-radius: 10px; border: 2px solid rgba(255, 255, 255, 0.3); background-color: rgba(255, 255, 255, 0.1); color: white; backdrop-filter: blur(10px); transition: all 0.3s ease; }
-    .stTextArea textarea:focus { border-color: #ffffff; box-shadow: 0 0 15px rgba(255, 255, 255, 0.5); }
-    .stButton>button { border-radius: 20px; border: 1px solid #ffffff; background-color: rgba(255, 255, 255, 0.2); color: white; font-weight: 600; transition: all 0.3s ease; }
-    .stButton>button:hover { background-color: rgba(255, 255, 255, 0.4); border-color: #ffffff; box-shadow: 0 0 15px rgba(255, 255, 255, 0.5); }
-    .response-card { background: rgba(0, 0, 0, 0.2); border-radius: 10px; padding: 1.5rem; margin-top: 1rem; border: 1px solid rgba(255, 255, 255, 0.2); backdrop-filter: blur(5px); color: white; }
-    .response-card table { color: white !important; }
-</style>
-""", unsafe_allow_html=True)
+# --- Theme ---
+apply_theme("#00c6ff, #0072ff, #3a7bd5, #00d2ff")
 
-# --- Asset Loading ---
-@st.cache_data
-def load_lottieurl(url: str):
-    r = requests.get(url)
-    if r.status_code != 200: return None
-    return r.json()
-
-LOTTIE_URL = "https://lottie.host/5788d57d-f4d0-466d-88b5-3037f69427b2/pS92yJe36u.json"
+# --- App Layout ---
+page_header("👨‍🏫 AI Prompt Coach", "Get instant feedback on your prompts to improve their effectiveness.", "coach")
 
-# --- LLM and Prompt ---
-try:
-    coach_llm = ChatOpenAI(api_key=st.secrets["OPENAI_API_KEY"], model_name="gpt-4o", temperature=0.3)
-except Exception:
-    st.error("Could not initialize the coach model. Check your OpenAI API key.")
-    st.stop()
+# --- Batch Helpers ---
+# pandas is only needed once a batch file is uploaded, so it is imported there.
+def load_batch_file(uploaded_file):
+    import pandas as pd
+    if uploaded_file.name.endswith(".jsonl"):
+        return pd.read_json(uploaded_file, lines=True)
+    return pd.read_csv(uploaded_file)
 
-COACH_SYSTEM_PROMPT = "..." # Same system prompt as before
+def batch_results_frame(prompts, results):
+    import pandas as pd
+    rows = [{"Row": key, "Prompt": prompts[key], **results[key]} for key in sorted(results)]
+    return pd.DataFrame(rows, columns=["Row", "Prompt", "Score", "Feedback", "Error"])
 
-# --- App Layout ---
-col1, col2 = st.columns([0.7, 0.3])
-with col1:
-    st.markdown('<h1 class="stTitle">👨‍🏫 AI Prompt Coach</h1>', unsafe_allow_html=True)
-    st.markdown("<p style='color: white;'>Get instant feedback on your prompts to improve their effectiveness.</p>", unsafe_allow_html=True)
-with col2:
-    lottie_json = load_lottieurl(LOTTIE_URL)
-    if lottie_json:
-        st_lottie(lottie_json, speed=1, height=200, key="coach_animation")
+single_tab, batch_tab = st.tabs(["Single Prompt", "Batch Evaluation"])
 
-user_prompt = st.text_area("Enter the prompt you want to evaluate:", height=150)
-if st.button("Evaluate My Prompt", type="primary"):
-    if not user_prompt:
-        st.warning("Please enter a prompt to evaluate.")
-    else:
+with single_tab:
+    user_prompt = st.text_area("Enter the prompt you want to evaluate:", height=150)
+    if st.button("Evaluate My Prompt", type="primary"):
         with st.spinner("Your coach is evaluating the prompt..."):
-            messages = [{"role": "system", "content": COACH_SYSTEM_PROMPT}, {"role": "user", "content": user_prompt}]
             try:
-                response = coach_llm.invoke(messages)
-                st.markdown(f'<div class="response-card">{response.content}</div>', unsafe_allow_html=True)
+                render_tokens(partial(evaluate, user_prompt), st.empty())
+            except ValueError as e:
+                st.warning(str(e))
+            except Exception as e:
+                st.error(f"An error occurred: {e}")
+
+with batch_tab:
+    uploaded_file = st.file_uploader("Upload prompts (CSV or JSONL):", type=["csv", "jsonl"])
+    if uploaded_file:
+        dataset_id = hashlib.sha256(uploaded_file.getvalue()).hexdigest()
+        batch_df = load_batch_file(uploaded_file)
+        prompt_column = st.selectbox("Column containing the prompts:", batch_df.columns.tolist())
+        concurrency = st.slider("Concurrent requests", min_value=1, max_value=32, value=8)
+        prompts = {i: str(p) for i, p in batch_df[prompt_column].reset_index(drop=True).dropna().items() if str(p).strip()}
+
+        # Results survive reruns, so a failed or interrupted run resumes where it stopped.
+        state = st.session_state.get('coach_batch')
+        if not state or state['dataset'] != (dataset_id, prompt_column):
+            state = st.session_state['coach_batch'] = {'dataset': (dataset_id, prompt_column), 'results': {}}
+        results = state['results']
+        remaining = {key: prompt for key, prompt in prompts.items() if key not in results or results[key]["Error"]}
+
+        st.caption(f"{len(prompts)} prompts · {len(prompts) - len(remaining)} evaluated · {len(remaining)} remaining")
+        run_label = "Resume Batch" if results and remaining else "Run Batch Evaluation"
+        run_clicked = st.button(run_label, type="primary", disabled=not remaining)
+        progress = st.progress(1 - len(remaining) / len(prompts) if prompts else 1.0)
+        table = st.empty()
+        if run_clicked:
+            done = len(prompts) - len(remaining)
+            last_refresh = 0.0
+            try:
+                for key, feedback, error in evaluate_many(remaining, max_concurrency=concurrency):
+                    results[key] = {"Score": parse_score(feedback), "Feedback": feedback, "Error": error}
+                    done += 1
+                    # Redrawing the whole table per result gets expensive for big files, so throttle it.
+                    if time.perf_counter() - last_refresh > 0.5 or done == len(prompts):
+                        progress.progress(done / len(prompts))
+                        table.dataframe(batch_results_frame(prompts, results), use_container_width=True)
+                        last_refresh = time.perf_counter()
             except Exception as e:
-                st.error(f"An error occurred: {e}")
\ No newline at end of file
+                st.error(f"Batch stopped: {e}")
+        if results:
+            results_df = batch_results_frame(prompts, results)
+            table.dataframe(results_df, use_container_width=True)
+            failed = int(results_df["Error"].notna().sum())
+            if failed:
+                st.warning(f"{failed} prompts failed. Press Resume Batch to retry them.")
+            dl1, dl2 = st.columns(2)
+            dl1.download_button("Download CSV", results_df.to_csv(index=False), "coach_batch_results.csv", "text/csv")
+            dl2.download_button("Download JSONL", results_df.to_json(orient="records", lines=True), "coach_batch_results.jsonl", "application/json")
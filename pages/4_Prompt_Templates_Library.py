@@ -1,110 +1,124 @@
 import streamlit as st
-import requests
-from streamlit_lottie import st_lottie
-import pandas as pd
+import html
+import math
+import time
+from utils.llm import get_llm
+from utils.search import TemplateIndex
+from utils.streaming import as_card, render_stream
+from utils.template_store import open_template_store
+from utils.templates import TemplateError, compile_template
+from utils.theme import apply_theme, page_header
+from utils.request_context import set_page
 
 # --- Page Configuration ---
 st.set_page_config(page_title="Prompt Templates Library", page_icon="📚", layout="wide")
+set_page("Templates Library")
 
-# --- Custom CSS for Advanced UI ---
-st.markdown("""
-<style>
-    @import url('https://fonts.googleapis.com/css2?family=Poppins:wght@300;400;600&display=swap');
-    
-    /* --- Gradient for this page --- */
-    .stApp {
-        background: linear-gradient(-45deg, #0f2027, #203a43, #2c5364, #1c2e3a);
-        background-size: 400% 400%;
-        animation: gradient 15s ease infinite;
-        font-family: 'Poppins', sans-serif;
-    }
-    @keyframes gradient { 0% { background-position: 0% 50%; } 50% { background-position: 100% 50%; } 100% { background-position: 0% 50%; } }
-    
-    /* --- General Styles (reusable) --- */
-    .stTitle { font-weight: 600; color: white; text-shadow: 2px 2px 4px rgba(0,0,0,0.2); }
-    .stTextInput input, .stSelectbox div[data-baseweb="select"] > div { border-radius: 10px; border: 2px solid rgba(255, 255, 255, 0.3); background-color: rgba(255, 255, 255, 0.1); color: white; backdrop-filter: blur(10px); }
-    
-    /* --- Custom Card for Prompts --- */
-    .prompt-card {
-        background: rgba(0, 0, 0, 0.2);
-        border-radius: 15px;
-        padding: 1.5rem;
-        margin-bottom: 1.5rem;
-        border: 1px solid rgba(255, 255, 255, 0.2);
-        backdrop-filter: blur(5px);
-        color: white;
-        transition: all 0.3s ease;
-    }
-    .prompt-card:hover {
-        border-color: rgba(255, 255, 255, 0.5);
-        box-shadow: 0 0 20px rgba(255, 255, 255, 0.1);
-    }
-    .prompt-card h3 {
-        color: #f1f1f1;
-    }
-    .prompt-card .stCodeBlock {
-        background-color: rgba(0, 0, 0, 0.3);
-        border-radius: 10px;
-    }
-</style>
-""", unsafe_allow_html=True)
+# --- Theme ---
+apply_theme("#0f2027, #203a43, #2c5364, #1c2e3a")
 
-# --- Asset Loading ---
-@st.cache_data
-def load_lottieurl(url: str):
-    r = requests.get(url)
-    if r.status_code != 200: return None
-    return r.json()
+# --- Data Loading ---
+@st.cache_resource
+def get_template_store():
+    return open_template_store()
 
-LOTTIE_URL = "https://lottie.host/80a316b6-1175-4c07-8809-b1d9774619d8/rO9k060XAa.json"
+@st.cache_resource
+def get_template_index():
+    # Built once per server process and shared by every session; new templates are indexed in place.
+    index = TemplateIndex()
+    for template_id, title, category, prompt in get_template_store().iter_all():
+        index.add(template_id, title, category, prompt)
+    return index
 
-# --- Data Loading ---
-@st.cache_data
-def load_prompts():
-    data = {
-        'Category': ['Marketing', 'Coding', 'Job Search', 'Creative Writing', 'Education'],
-        'Title': ['AIDA Copywriting Framework', 'Python Code Explainer', 'Targeted Cover Letter', 'Character Backstory Generator', 'Lesson Plan Creator'],
-        'Prompt': [
-            'Act as an expert copywriter. Write a product description for [Product Name] using the AIDA (Attention, Interest, Desire, Action) framework. The target audience is [Target Audience]. The key benefits are [List of Benefits].',
-            'Act as a senior Python developer and code reviewer. Explain the following code snippet line by line, identify potential bugs or inefficiencies, and suggest a more optimal version.\n\n```python\n[Your Python Code Here]\n```',
-            'Act as a professional resume writer and career coach. Write a compelling cover letter for the role of [Job Title] at [Company Name]. My resume highlights are [Your Key Skills/Achievements]. The job description emphasizes [Key Requirements from Job Description]. Tailor the letter to show how my experience aligns perfectly with their needs.',
-            'Generate a detailed character backstory for a [Genre, e.g., fantasy] novel. The character is a [Archetype, e.g., reluctant hero] named [Name]. Key traits are [Trait 1, Trait 2]. Include their childhood, a defining traumatic event, and their ultimate motivation.',
-            'Create a detailed lesson plan for a 50-minute high school class on [Subject, e.g., the water cycle]. The plan should include learning objectives, required materials, a 10-minute introductory activity, a 25-minute main explanation, and a 15-minute practical exercise or assessment.'
-        ]
-    }
-    return pd.DataFrame(data)
+store = get_template_store()
+index = get_template_index()
+
+MAX_SEARCH_RESULTS = 500
+
+def add_template(title, category, prompt):
+    template_id = store.add(title, category, prompt)
+    index.add(template_id, title, category, prompt)
 
-df = load_prompts()
+def render_template_cards(rows, bodies):
+    # One markdown call per page of results instead of several elements per template.
+    cards = [
+        f'<div class="prompt-card"><h3>{html.escape(title)}</h3>'
+        f'<div class="category">Category: {html.escape(category)}</div>'
+        f'<pre><code>{html.escape(bodies.get(template_id, ""))}</code></pre></div>'
+        for template_id, title, category in rows
+    ]
+    st.markdown("".join(cards), unsafe_allow_html=True)
 
 # --- App Layout ---
-col1, col2 = st.columns([0.7, 0.3])
-with col1:
-    st.markdown('<h1 class="stTitle">📚 Prompt Templates Library</h1>', unsafe_allow_html=True)
-    st.markdown("<p style='color: white;'>A curated collection of high-quality prompts to kickstart your work.</p>", unsafe_allow_html=True)
-with col2:
-    lottie_json = load_lottieurl(LOTTIE_URL)
-    if lottie_json:
-        st_lottie(lottie_json, speed=1, height=200, key="library_animation")
+page_header("📚 Prompt Templates Library", "A curated collection of high-quality prompts to kickstart your work.", "library")
 
 # --- Filtering and Search ---
 search_term = st.text_input("Search prompts...", "")
-categories = ['All'] + sorted(df['Category'].unique().tolist())
+categories = ['All'] + store.categories()
 selected_category = st.selectbox("Filter by category:", categories)
+search_modes = {"Keyword": "keyword", "Semantic": "semantic", "Hybrid": "hybrid"} if index.has_vectors else {"Keyword": "keyword"}
+search_mode = st.radio("Search mode:", list(search_modes), horizontal=True) if len(search_modes) > 1 else "Keyword"
+page_size = st.selectbox("Templates per page:", [10, 25, 50], index=0)
 
 # Apply filters
-filtered_df = df
-if selected_category != 'All':
-    filtered_df = filtered_df[filtered_df['Category'] == selected_category]
-if search_term:
-    filtered_df = filtered_df[filtered_df['Title'].str.contains(search_term, case=False)]
+category = None if selected_category == 'All' else selected_category
+if search_term.strip():
+    start = time.perf_counter()
+    matches = index.search(search_term, limit=MAX_SEARCH_RESULTS, category=category, mode=search_modes[search_mode])
+    st.caption(f"{len(matches)} results in {(time.perf_counter() - start) * 1000:.1f} ms")
+    total = len(matches)
+else:
+    total = store.count(category)
 
 # --- Display Prompts ---
-if filtered_df.empty:
+if total == 0:
     st.warning("No prompts found with your current filters.")
 else:
-    for index, row in filtered_df.iterrows():
-        st.markdown('<div class="prompt-card">', unsafe_allow_html=True)
-        st.markdown(f"### {row['Title']}")
-        st.caption(f"Category: {row['Category']}")
-        st.code(row['Prompt'], language='text')
-        st.markdown('</div>', unsafe_allow_html=True)
\ No newline at end of file
+    page_count = math.ceil(total / page_size)
+    page = st.number_input(f"Page (of {page_count})", min_value=1, max_value=page_count, value=1) if page_count > 1 else 1
+    offset = (page - 1) * page_size
+    # Only the visible page is read from the store, and prompt bodies only for those rows.
+    if search_term.strip():
+        rows = store.get_many([template_id for template_id, _ in matches[offset:offset + page_size]])
+    else:
+        rows = store.list_page(offset, page_size, category)
+    bodies = store.get_bodies([row[0] for row in rows])
+    render_template_cards(rows, bodies)
+
+    # --- Run a Template ---
+    with st.expander("▶️ Run a template"):
+        run_titles = {template_id: title for template_id, title, _ in rows}
+        run_id = st.selectbox("Template from this page:", list(run_titles), format_func=run_titles.get)
+        # Compiled templates are cached, so reruns don't re-parse the body.
+        template = compile_template(bodies[run_id])
+        with st.form("run_template_form"):
+            values = {
+                placeholder.name: st.text_area(placeholder.name, placeholder=placeholder.hint, height=100, key=f"run_{run_id}_{placeholder.name}")
+                for placeholder in template.placeholders
+            }
+            run_clicked = st.form_submit_button("Run Template")
+        if run_clicked:
+            try:
+                prompt = template.render(values)
+            except TemplateError as e:
+                st.warning(str(e))
+            else:
+                try:
+                    llm = get_llm("openai", "gpt-4o", temperature=0.7)
+                    with st.spinner("Running your template..."):
+                        render_stream(llm, prompt, st.empty(), render=as_card("prompt-card", pre=True))
+                except Exception as e:
+                    st.error(f"Could not run the template: {e}")
+
+# --- Contribute ---
+with st.expander("➕ Add a template"):
+    with st.form("add_template_form", clear_on_submit=True):
+        new_title = st.text_input("Title")
+        new_category = st.text_input("Category")
+        new_prompt = st.text_area("Prompt", height=150)
+        if st.form_submit_button("Add Template"):
+            if new_title and new_category and new_prompt:
+                add_template(new_title, new_category, new_prompt)
+                st.success(f"Added '{new_title}' to the library.")
+            else:
+                st.warning("Please fill in the title, category and prompt.")
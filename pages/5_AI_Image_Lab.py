@@ -1,87 +1,173 @@
 import streamlit as st
-import requests
-from streamlit_lottie import st_lottie
-from diffusers import StableDiffusionPipeline
-from PIL import Image
-from io import BytesIO
+import random
+import uuid
+from services import images
+from utils.image_worker import CANCELLED, DONE, FAILED, MAX_SEED, QUEUED, RUNNING, WorkerBusy, get_image_worker
+from utils.theme import apply_theme, page_header
 
 # --- Page Configuration ---
 st.set_page_config(page_title="AI Image Lab", page_icon="🖼️", layout="wide")
 
-# --- Custom CSS for Advanced UI ---
-st.markdown("""
-<style>
-    @import url('https://fonts.googleapis.com/css2?family=Poppins:wght@300;400;600&display=swap');
-    /* --- Gradient for this page --- */
-    .stApp {
-        background: linear-gradient(-45deg, #43cea2, #185a9d, #47a8bd, #2c3e50);
-        background-size: 400% 400%;
-        animation: gradient 15s ease infinite;
-        font-family: 'Poppins', sans-serif;
-    }
-    @keyframes gradient { 0% { background-position: 0% 50%; } 50% { background-position: 100% 50%; } 100% { background-position: 0% 50%; } }
-    /* --- General Styles --- */
-    .stTitle { font-weight: 600; color: white; text-shadow: 2px 2px 4px rgba(0,0,0,0.2); }
-    .stTextArea textarea { border-radius: 10px; border: 2px solid rgba(255, 255, 255, 0.3); background-color: rgba(255, 255, 255, 0.1); color: white; backdrop-filter: blur(10px); transition: all 0.3s ease; }
-    .stTextArea textarea:focus { border-color: #ffffff; box-shadow: 0 0 15px rgba(255, 255, 255, 0.5); }
-    .stButton>button { border-radius: 20px; border: 1px solid #ffffff; background-color: rgba(255, 255, 255, 0.2); color: white; font-weight: 600; transition: all 0.3s ease; }
-    .stButton>button:hover { background-color: rgba(255, 255, 255, 0.4); border-color: #ffffff; box-shadow: 0 0 15px rgba(255, 255, 255, 0.5); }
-    .image-container { background: rgba(0, 0, 0, 0.2); border-radius: 10px; padding: 1.5rem; border: 1px solid rgba(255, 255, 255, 0.2); backdrop-filter: blur(5px); color: white; text-align: center; }
-    .image-container img { max-width: 100%; border-radius: 8px; box-shadow: 0 4px 8px rgba(0, 0, 0, 0.3); }
-</style>
-""", unsafe_allow_html=True)
-
-# --- Asset Loading ---
-@st.cache_data
-def load_lottieurl(url: str):
-    r = requests.get(url)
-    if r.status_code != 200: return None
-    return r.json()
-
-LOTTIE_URL = "https://lottie.host/4e50481b-922a-45c0-b53c-1346999091e3/ZcZk0l977n.json"
-
-# --- Model Initialization ---
-@st.cache_resource
-def load_stable_diffusion():
-    try:
-        pipe = StableDiffusionPipeline.from_pretrained("stabilityai/stable-diffusion-xl-base-1.0", use_safetensors=True)
-        pipe = pipe.to("cpu") # You might want to use "cuda" if you have a GPU
-        return pipe
-    except Exception as e:
-        st.error(f"Error loading Stable Diffusion model: {e}")
-        return None
+# --- Theme ---
+apply_theme("#43cea2, #185a9d, #47a8bd, #2c3e50")
+
+# --- Generation Worker ---
+# Generation runs in a background process; this page only queues jobs and polls them.
+worker = get_image_worker()
+if 'image_owner' not in st.session_state:
+    st.session_state['image_owner'] = uuid.uuid4().hex
+if 'image_jobs' not in st.session_state:
+    st.session_state['image_jobs'] = []
+if 'image_seed' not in st.session_state:
+    st.session_state['image_seed'] = random.randint(0, MAX_SEED)
+# PNG bytes of finished jobs by job id, read from the image cache once per session
+# rather than on every rerun.
+if 'image_results' not in st.session_state:
+    st.session_state['image_results'] = {}
 
-sd_pipeline = load_stable_diffusion()
+def new_seed():
+    st.session_state['image_seed'] = random.randint(0, MAX_SEED)
+
+def queue_job(submit, *args, **kwargs):
+    # `submit` is images.submit or images.render_full_quality; both queue for this session.
+    try:
+        job_id = submit(st.session_state['image_owner'], *args, **kwargs)
+    except ValueError as e:
+        st.warning(str(e))
+    except WorkerBusy as e:
+        st.toast(str(e))
+    else:
+        st.session_state['image_jobs'].insert(0, job_id)
+        st.toast("Your images are queued." if len(worker.get(job_id).items) > 1 else "Your image is queued.")
 
 # --- App Layout ---
-col1, col2 = st.columns([0.7, 0.3])
-with col1:
-    st.markdown('<h1 class="stTitle">🖼️ AI Image Lab</h1>', unsafe_allow_html=True)
-    st.markdown("<p style='color: white;'>Generate images from your prompts using Stable Diffusion.</p>", unsafe_allow_html=True)
-with col2:
-    lottie_json = load_lottieurl(LOTTIE_URL)
-    if lottie_json:
-        st_lottie(lottie_json, speed=1, height=200, key="image_lab_animation")
-
-prompt = st.text_area("Enter your image prompt:", height=150, placeholder="e.g., A futuristic cityscape of Bengaluru at night, neon lights, flying vehicles")
+page_header("🖼️ AI Image Lab", "Generate images from your prompts using Stable Diffusion.", "image_lab")
+
+batch_mode = st.radio("Generate:", ["One image", "Variations", "Several prompts"], horizontal=True, help="Batches are generated together in one pass, which is cheaper per image than separate jobs.")
+if batch_mode == "Several prompts":
+    prompt = st.text_area("Enter your image prompts, one per line:", height=150, placeholder="e.g., A futuristic cityscape of Bengaluru at night\nThe same city at dawn, watercolor")
+    prompts = [line.strip() for line in prompt.splitlines() if line.strip()]
+else:
+    prompt = st.text_area("Enter your image prompt:", height=150, placeholder="e.g., A futuristic cityscape of Bengaluru at night, neon lights, flying vehicles")
+    prompts = [prompt] if prompt else []
+if batch_mode == "Variations" and worker.max_batch > 2:
+    variations = st.slider("Number of variations", min_value=2, max_value=worker.max_batch, value=min(4, worker.max_batch), help="Each variation uses the next seed.")
+elif batch_mode == "Variations":
+    # A slider needs min < max, so there is nothing to choose with IMAGE_MAX_BATCH of 2 or less.
+    variations = max(1, worker.max_batch)
+    st.caption(f"Each batch holds at most {variations} image{'s' if variations > 1 else ''}.")
+else:
+    variations = 1
 negative_prompt = st.text_area("Negative prompt (optional):", height=50, placeholder="e.g., blurry, low quality")
-num_inference_steps = st.slider("Number of Steps", min_value=20, max_value=100, value=50)
+quality = st.radio("Quality:", ["⚡ Fast preview", "Full quality"], horizontal=True, help="Previews use a fast scheduler with few steps at half resolution. Re-render a preview you like at full quality with the same seed.")
+preview = quality != "Full quality"
+if not preview:
+    num_inference_steps = st.slider("Number of Steps", min_value=20, max_value=100, value=50)
+else:
+    num_inference_steps = 50
 guidance_scale = st.slider("Guidance Scale", min_value=5.0, max_value=15.0, value=7.5, step=0.5)
+seed_col, reseed_col = st.columns([0.8, 0.2])
+seed = seed_col.number_input("Seed", min_value=0, max_value=MAX_SEED, step=1, key="image_seed")
+reseed_col.button("🎲 New seed", on_click=new_seed)
 
-if st.button("Generate Image", type="primary", disabled=not sd_pipeline):
-    if not prompt:
-        st.warning("Please enter a prompt to generate an image.")
-    elif sd_pipeline:
-        with st.spinner("Generating your image..."):
-            try:
-                image = sd_pipeline(prompt, negative_prompt=negative_prompt, num_inference_steps=num_inference_steps, guidance_scale=guidance_scale).images
-                if image and len(image) > 0:
-                    st.markdown('<div class="image-container">', unsafe_allow_html=True)
-                    st.image(image, caption="Generated Image")
-                    st.markdown('</div>', unsafe_allow_html=True)
-                else:
-                    st.error("Could not generate image.")
-            except Exception as e:
-                st.error(f"Error during image generation: {e}")
-    else:
-        st.error("Stable Diffusion model not loaded. Check your setup.")
\ No newline at end of file
+worker_failed = worker.state.startswith("failed")
+if worker_failed:
+    st.error(f"Error loading Stable Diffusion model: {worker.state}")
+elif worker.state != "ready":
+    st.info("The image model is loading in the background. You can queue a prompt now.")
+elif worker.load_stats:
+    peak = worker.load_stats.get("peak_rss_mb")
+    st.caption(f"Model loaded in {worker.load_stats['load_seconds']:.1f}s" + (f" · peak memory {peak:,.0f} MB" if peak else ""))
+
+if st.button("Generate Images" if batch_mode != "One image" else "Generate Image", type="primary", disabled=worker_failed):
+    queue_job(images.submit, prompts, negative_prompt, guidance_scale, seed, variations=variations, preview=preview, steps=num_inference_steps)
+
+GRID_COLUMNS = 2
+
+def show_job(job):
+    mode = "Preview" if job.params["preview"] else "Full quality"
+    prompts = list(dict.fromkeys(item["prompt"] for item in job.items))
+    st.markdown(f"**{' · '.join(prompts)}**")
+    seeds = ", ".join(str(item["seed"]) for item in job.items)
+    st.caption(f"{mode} · {len(job.items)} × {job.params['size']}px · {job.params['steps']} steps · seed {seeds}")
+    if job.status == QUEUED:
+        st.caption(f"Queued (position {worker.queue_position(job.id)})")
+    elif job.status == RUNNING:
+        st.progress(job.progress, text=f"Step {job.step} of {job.total_steps}")
+    if job.status in (QUEUED, RUNNING):
+        st.button("Cancel", key=f"cancel_{job.id}", on_click=worker.cancel, args=[job.id])
+    elif job.status == DONE:
+        if job.cached:
+            st.caption("Served from cache")
+        else:
+            elapsed = job.finished_at - job.started_at
+            st.caption(f"Generated in {elapsed:.0f}s" + (f" ({elapsed / len(job.items):.0f}s per image)" if len(job.items) > 1 else ""))
+        results = st.session_state['image_results']
+        if job.id not in results:
+            results[job.id] = images.images(job)
+        columns = GRID_COLUMNS if len(job.items) > 1 else 1
+        for row_start in range(0, len(job.items), columns):
+            row = list(zip(results[job.id], job.items))[row_start:row_start + columns]
+            for col, (image, item) in zip(st.columns(columns), row):
+                with col:
+                    if image is None:
+                        st.caption("This image has been evicted from the cache. Generate it again to restore it.")
+                    else:
+                        caption = f"{item['prompt'][:60]} · seed {item['seed']}" if len(job.items) > 1 else None
+                        st.markdown('<div class="image-container">', unsafe_allow_html=True)
+                        st.image(image, caption=caption, use_container_width=True)
+                        st.markdown('</div>', unsafe_allow_html=True)
+        if job.params["preview"]:
+            st.button("Render at full quality", key=f"full_{job.id}", on_click=queue_job, args=[images.render_full_quality, job, num_inference_steps])
+    elif job.status == FAILED:
+        st.error(f"Error during image generation: {job.error}")
+    elif job.status == CANCELLED:
+        st.caption("Cancelled.")
+
+jobs = [job for job in (worker.get(job_id) for job_id in st.session_state['image_jobs']) if job]
+active_ids = [job.id for job in jobs if job.status in (QUEUED, RUNNING)]
+# Forget the images of jobs the worker no longer remembers.
+known = {job.id for job in jobs}
+for job_id in [job_id for job_id in st.session_state['image_results'] if job_id not in known]:
+    del st.session_state['image_results'][job_id]
+
+# Only this fragment reruns while jobs are queued or running, and it only draws those
+# jobs; finished ones are drawn once per page run below it.
+@st.fragment(run_every=1.0 if active_ids else None)
+def job_status():
+    active = [job for job in (worker.get(job_id) for job_id in active_ids) if job]
+    for job in active:
+        show_job(job)
+    # A job has finished: rerun the page so it moves to the finished list (and polling
+    # stops once nothing is left in flight).
+    if len(active) < len(active_ids) or any(job.finished for job in active):
+        st.rerun()
+
+if jobs:
+    st.subheader("Your Images")
+    if active_ids:
+        job_status()
+    for job in jobs:
+        if job.id not in active_ids:
+            show_job(job)
+
+
+# --- Gallery ---
+# Reads only the cached thumbnails; the full PNG is loaded when one is opened.
+GALLERY_COLUMNS = 4
+gallery = worker.cache.recent(limit=12)
+if gallery:
+    st.subheader("🖼️ Recent Generations")
+    for row_start in range(0, len(gallery), GALLERY_COLUMNS):
+        for col, (key, params) in zip(st.columns(GALLERY_COLUMNS), gallery[row_start:row_start + GALLERY_COLUMNS]):
+            with col:
+                thumbnail = worker.cache.thumbnail(key)
+                if thumbnail:
+                    st.image(thumbnail, caption=params["prompt"][:60], use_container_width=True)
+                    if st.button("Open", key=f"open_{key}"):
+                        st.session_state['gallery_selected'] = key
+    selected = st.session_state.get('gallery_selected')
+    if selected:
+        full_image = worker.cache.get(selected)
+        if full_image:
+            st.image(full_image, caption="Full size")
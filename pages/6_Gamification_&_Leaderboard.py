@@ -1,83 +1,91 @@
 import streamlit as st
-import requests
-from streamlit_lottie import st_lottie
-import pandas as pd
-import random
+import uuid
+from utils.leaderboard import get_leaderboard
+from utils.scoring import FAILED, SCORED, ScoringBusy, get_scoring_queue
+from utils.theme import apply_theme, page_header
 
 # --- Page Configuration ---
 st.set_page_config(page_title="Gamification & Leaderboard", page_icon="🏆", layout="wide")
 
-# --- Custom CSS for Advanced UI ---
-st.markdown("""
-<style>
-    @import url('https://fonts.googleapis.com/css2?family=Poppins:wght@300;400;600&display=swap');
-    /* --- Gradient for this page --- */
-    .stApp {
-        background: linear-gradient(-45deg, #ff9966, #ff5e62, #c94b4b, #43cea2);
-        background-size: 400% 400%;
-        animation: gradient 15s ease infinite;
-        font-family: 'Poppins', sans-serif;
-    }
-    @keyframes gradient { 0% { background-position: 0% 50%; } 50% { background-position: 100% 50%; } 100% { background-position: 0% 50%; } }
-    /* --- General Styles --- */
-    .stTitle { font-weight: 600; color: white; text-shadow: 2px 2px 4px rgba(0,0,0,0.2); }
-    .stTextInput input { border-radius: 10px; border: 2px solid rgba(255, 255, 255, 0.3); background-color: rgba(255, 255, 255, 0.1); color: white; backdrop-filter: blur(10px); }
-    .stTextInput input:focus { border-color: #ffffff; box-shadow: 0 0 15px rgba(255, 255, 255, 0.5); }
-    .stButton>button { border-radius: 20px; border: 1px solid #ffffff; background-color: rgba(255, 255, 255, 0.2); color: white; font-weight: 600; transition: all 0.3s ease; }
-    .stButton>button:hover { background-color: rgba(255, 255, 255, 0.4); border-color: #ffffff; box-shadow: 0 0 15px rgba(255, 255, 255, 0.5); }
-    .leaderboard-container { background: rgba(0, 0, 0, 0.2); border-radius: 10px; padding: 1.5rem; border: 1px solid rgba(255, 255, 255, 0.2); backdrop-filter: blur(5px); color: white; }
-    .leaderboard-container table { color: white !important; }
-</style>
-""", unsafe_allow_html=True)
+# --- Theme ---
+apply_theme("#ff9966, #ff5e62, #c94b4b, #43cea2")
 
-# --- Asset Loading ---
-@st.cache_data
-def load_lottieurl(url: str):
-    r = requests.get(url)
-    if r.status_code != 200: return None
-    return r.json()
-
-LOTTIE_URL = "https://lottie.host/532c5c81-ff2b-4607-9144-096455c0714f/Q01j7JGYNq.json"
-
-# --- Dummy Gamification Logic ---
-if 'user_points' not in st.session_state:
-    st.session_state['user_points'] = 0
-if 'leaderboard_data' not in st.session_state:
-    st.session_state['leaderboard_data'] = pd.DataFrame({
-        'User': ['AI Enthusiast 1', 'Prompt Master', 'Code Whisperer'],
-        'Points': [150, 220, 180]
-    }).sort_values(by='Points', ascending=False).reset_index(drop=True)
+# --- Player and Leaderboard ---
+# The board is shared by every session; each session plays as one anonymous player.
+leaderboard = get_leaderboard()
+scoring = get_scoring_queue()
+if 'player_id' not in st.session_state:
+    st.session_state['player_id'] = uuid.uuid4().hex
+    st.session_state['player_name'] = f"Player {st.session_state['player_id'][:4]}"
 
+LEADERBOARD_SIZE = 10
 weekly_challenge = "Write a creative prompt that generates a short story about a street dog in Bengaluru who discovers a hidden talent."
 challenge_reward = 20
 
 def submit_prompt(prompt):
-    if prompt:
-        st.session_state['user_points'] += challenge_reward
-        new_entry = pd.DataFrame({'User': ['You'], 'Points': [st.session_state['user_points']]})
-        st.session_state['leaderboard_data'] = pd.concat([st.session_state['leaderboard_data'], new_entry], ignore_index=True)
-        st.session_state['leaderboard_data'] = st.session_state['leaderboard_data'].sort_values(by='Points', ascending=False).reset_index(drop=True)
-        st.success(f"Your prompt was submitted! You earned {challenge_reward} points.")
-    else:
+    if not prompt:
         st.warning("Please enter a prompt for the challenge.")
+        return
+    # Grading happens in the background; points reach the leaderboard once it finishes.
+    try:
+        scoring.submit(st.session_state['player_id'], st.session_state['player_name'], prompt, challenge_reward)
+        st.success("Your prompt was submitted! The AI coach is grading it now.")
+    except ScoringBusy as e:
+        st.warning(str(e))
+
+def show_submission(submission):
+    st.markdown(f"**{submission.prompt[:80]}{'…' if len(submission.prompt) > 80 else ''}**")
+    if submission.status == SCORED:
+        st.caption(f"Score {submission.score:g}/10 · +{submission.points} points")
+        with st.expander("Coach feedback"):
+            st.markdown(submission.feedback)
+    elif submission.status == FAILED:
+        st.caption(f"Could not be graded: {submission.error}")
+    else:
+        st.caption("Waiting to be graded…")
+
+def rename_player():
+    # The widget has its own key: Streamlit drops widget state when the page is left.
+    name = st.session_state['player_name_input'].strip()
+    if name:
+        st.session_state['player_name'] = name
+        leaderboard.rename(st.session_state['player_id'], name)
 
 # --- App Layout ---
-col1, col2 = st.columns([0.7, 0.3])
+col1, col2 = page_header("🏆 Gamification & Leaderboard", "Participate in challenges and track your progress on the leaderboard.", "gamification", height=250)
 with col1:
-    st.markdown('<h1 class="stTitle">🏆 Gamification & Leaderboard</h1>', unsafe_allow_html=True)
-    st.markdown("<p style='color: white;'>Participate in challenges and track your progress on the leaderboard.</p>", unsafe_allow_html=True)
     st.subheader("🏆 Weekly Prompt Challenge")
-    st.info(f"**Challenge:** {weekly_challenge} (Reward: {challenge_reward} points)")
+    st.info(f"**Challenge:** {weekly_challenge} (Up to {challenge_reward} points, graded by the AI coach)")
     challenge_prompt = st.text_area("Submit your prompt here:", height=100)
     st.button("Submit Challenge Prompt", on_click=submit_prompt, args=[challenge_prompt], type="primary")
+    submissions = scoring.for_user(st.session_state['player_id'])
+    grading = any(not s.finished for s in submissions)
+
+    # Only this fragment polls while grading is in progress.
+    @st.fragment(run_every=2.0 if grading else None)
+    def submission_status():
+        current = scoring.for_user(st.session_state['player_id'])
+        for submission in current[:5]:
+            show_submission(submission)
+        # Once grading is done, rerun the page so the points and leaderboard update.
+        if grading and all(s.finished for s in current):
+            st.rerun()
+
+    if submissions:
+        st.subheader("Your Submissions")
+        submission_status()
+
     st.subheader("Your Progress")
-    st.markdown(f"<p style='color: white;'>Your Current Points: <span style='font-weight: bold;'>{st.session_state['user_points']}</span></p>", unsafe_allow_html=True)
+    st.text_input("Display name:", value=st.session_state['player_name'], key="player_name_input", on_change=rename_player)
+    standing = leaderboard.rank(st.session_state['player_id'])
+    points, rank = (standing[1], f"#{standing[0]:,} of {leaderboard.count():,}") if standing else (0, "not ranked yet")
+    st.markdown(f"<p style='color: white;'>Your Current Points: <span style='font-weight: bold;'>{points}</span> · Rank: <span style='font-weight: bold;'>{rank}</span></p>", unsafe_allow_html=True)
 
 with col2:
-    lottie_json = load_lottieurl(LOTTIE_URL)
-    if lottie_json:
-        st_lottie(lottie_json, speed=1, height=250, key="gamification_animation")
     st.subheader("🏆 Leaderboard")
     st.markdown('<div class="leaderboard-container">', unsafe_allow_html=True)
-    st.dataframe(st.session_state['leaderboard_data'])
+    st.dataframe(
+        [{"Rank": rank, "User": name, "Points": points} for rank, name, points in leaderboard.top(LEADERBOARD_SIZE)],
+        hide_index=True,
+    )
     st.markdown('</div>', unsafe_allow_html=True)
\ No newline at end of file
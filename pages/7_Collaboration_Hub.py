@@ -1,101 +1,119 @@
 import streamlit as st
-import requests
-from streamlit_lottie import st_lottie
-from langchain_openai import ChatOpenAI
+import time
+from services.chain import ChainStep, execute, trim_memo
+from utils.streaming import CURSOR, REFRESH_INTERVAL, as_card
+from utils.theme import apply_theme, page_header
+from utils.request_context import set_page
 
 # --- Page Configuration ---
 st.set_page_config(page_title="Collaboration Hub", page_icon="🤝", layout="wide")
+set_page("Collaboration Hub")
 
-# --- Custom CSS for Advanced UI ---
-st.markdown("""
-<style>
-    @import url('https://fonts.googleapis.com/css2?family=Poppins:wght@300;400;600&display=swap');
-    /* --- Gradient for this page --- */
-    .stApp {
-        background: linear-gradient(-45deg, #00b09b, #96c93d, #4568dc, #b06ab3);
-        background-size: 400% 400%;
-        animation: gradient 15s ease infinite;
-        font-family: 'Poppins', sans-serif;
-    }
-    @keyframes gradient { 0% { background-position: 0% 50%; } 50% { background-position: 100% 50%; } 100% { background-position: 0% 50%; } }
-    /* --- General Styles --- */
-    .stTitle { font-weight: 600; color: white; text-shadow: 2px 2px 4px rgba(0,0,0,0.2); }
-    .stTextArea textarea { border-radius: 10px; border: 2px solid rgba(255, 255, 255, 0.3); background-color: rgba(255, 255, 255, 0.1); color: white; backdrop-filter: blur(10px); transition: all 0.3s ease; }
-    .stTextArea textarea:focus { border-color: #ffffff; box-shadow: 0 0 15px rgba(255, 255, 255, 0.5); }
-    .stButton>button { border-radius: 20px; border: 1px solid #ffffff; background-color: rgba(255, 255, 255, 0.2); color: white; font-weight: 600; transition: all 0.3s ease; }
-    .stButton>button:hover { background-color: rgba(255, 255, 255, 0.4); border-color: #ffffff; box-shadow: 0 0 15px rgba(255, 255, 255, 0.5); }
-    .chain-container { background: rgba(0, 0, 0, 0.2); border-radius: 10px; padding: 1.5rem; border: 1px solid rgba(255, 255, 255, 0.2); backdrop-filter: blur(5px); color: white; margin-bottom: 1rem; }
-</style>
-""", unsafe_allow_html=True)
-
-# --- Asset Loading ---
-@st.cache_data
-def load_lottieurl(url: str):
-    r = requests.get(url)
-    if r.status_code != 200: return None
-    return r.json()
-
-LOTTIE_URL = "https://lottie.host/69059723-a89c-4d99-b99c-785889c3e09c/l4VpXFohs8.json"
-
-# --- LLM Initialization ---
-try:
-    llm = ChatOpenAI(api_key=st.secrets["OPENAI_API_KEY"], model_name="gpt-4o", temperature=0.5)
-except Exception as e:
-    st.error("Failed to initialize the language model. Please check your API key.")
-    st.stop()
+# --- Theme ---
+apply_theme("#00b09b, #96c93d, #4568dc, #b06ab3")
 
 # --- Session State for Prompt Chain ---
 if 'prompt_chain' not in st.session_state:
     st.session_state['prompt_chain'] = []
-if 'chain_output' not in st.session_state:
-    st.session_state['chain_output'] = ""
+if 'chain_results' not in st.session_state:
+    st.session_state['chain_results'] = []
+# Step outputs keyed by a hash of the step's prompt and upstream outputs (see utils.chain.step_key),
+# so re-executing after an edit only calls the model for the edited step and what depends on it.
+if 'chain_memo' not in st.session_state:
+    st.session_state['chain_memo'] = {}
 
 def add_step():
-    st.session_state['prompt_chain'].append(st.session_state.new_prompt)
+    # Step numbers in the multiselect are 1-based; ChainStep stores 0-based indices.
+    inputs = [n - 1 for n in st.session_state.get('new_inputs', [])]
+    st.session_state['prompt_chain'].append(ChainStep(st.session_state.new_prompt, inputs))
     st.session_state.new_prompt = ""
+    # Default the next step to building on the one just added, like a linear chain.
+    st.session_state.new_inputs = [len(st.session_state['prompt_chain'])]
+
+def update_step(i):
+    inputs = [n - 1 for n in st.session_state.get(f"edit_inputs_{i}", [])]
+    st.session_state['prompt_chain'][i] = ChainStep(st.session_state[f"edit_prompt_{i}"], inputs)
+
+def step_card(i):
+    return as_card("chain-container", pre=True, prefix=f"Step {i+1} Output:\n")
+
+def render_step_result(i, result, card_placeholder, stats_placeholder):
+    if result is None:
+        card_placeholder.info(f"Step {i+1} skipped: it depends on a step that failed.")
+    elif result.error:
+        card_placeholder.error(f"Error in step {i+1}: {result.error}")
+    else:
+        step_card(i)(card_placeholder, result.output)
+        stats_placeholder.caption(result.stats)
+
+def execute_chain(container, reuse_outputs=True):
+    steps = st.session_state['prompt_chain']
+    memo = st.session_state['chain_memo'] if reuse_outputs else {}
+    placeholders = [(container.empty(), container.empty()) for _ in steps]
+    partial = [""] * len(steps)
+    last_refresh = [0.0] * len(steps)
 
-def execute_chain():
-    full_prompt = ""
-    outputs = []
-    with st.spinner("Executing the prompt chain..."):
-        for i, prompt in enumerate(st.session_state['prompt_chain']):
-            if i > 0:
-                full_prompt += f"\n\nBased on the previous output: {outputs[-1]}\n\n"
-            full_prompt += f"Step {i+1}: {prompt}"
-            try:
-                response = llm.invoke(full_prompt).content
-                outputs.append(response)
-            except Exception as e:
-                st.error(f"Error in step {i+1}: {e}")
-                return
-    st.session_state['chain_output'] = "\n\n".join([f"Step {i+1} Output:\n{output}" for i, output in enumerate(outputs)])
+    def on_token(i, token):
+        partial[i] += token
+        now = time.perf_counter()
+        if now - last_refresh[i] >= REFRESH_INTERVAL:
+            step_card(i)(placeholders[i][0], partial[i] + CURSOR)
+            last_refresh[i] = now
+
+    def on_result(i, result):
+        render_step_result(i, result, *placeholders[i])
+
+    try:
+        with st.spinner("Executing the prompt chain..."):
+            run = execute(steps, memo=memo, on_token=on_token, on_result=on_result)
+    except Exception as e:
+        # Building the model client (on the first run) failed, e.g. a missing API key.
+        container.error(f"Could not run the chain: {e}")
+        return
+    for i, result in enumerate(run.results):
+        if result is None:
+            render_step_result(i, result, *placeholders[i])
+    if not reuse_outputs:
+        st.session_state['chain_memo'].update(memo)
+    trim_memo(st.session_state['chain_memo'])
+    st.session_state['chain_results'] = run.results
+    container.caption(run.summary)
 
 def clear_chain():
     st.session_state['prompt_chain'] = []
-    st.session_state['chain_output'] = ""
+    st.session_state['chain_results'] = []
+    st.session_state['chain_memo'] = {}
 
 # --- App Layout ---
-col1, col2 = st.columns([0.7, 0.3])
+col1, _ = page_header("🤝 Collaboration Hub", "Simulate collaborative prompt engineering by building and executing prompt chains.", "collaboration", height=300)
 with col1:
-    st.markdown('<h1 class="stTitle">🤝 Collaboration Hub</h1>', unsafe_allow_html=True)
-    st.markdown("<p style='color: white;'>Simulate collaborative prompt engineering by building and executing prompt chains.</p>", unsafe_allow_html=True)
-
     st.subheader("Build Your Prompt Chain")
     st.text_input("Enter a prompt step:", key="new_prompt")
+    if st.session_state['prompt_chain']:
+        # Steps only see the outputs they ask for; steps with no shared inputs run in parallel.
+        st.multiselect("Uses the output of steps:", options=list(range(1, len(st.session_state['prompt_chain']) + 1)), key="new_inputs", format_func=lambda n: f"Step {n}")
     st.button("Add Step to Chain", on_click=add_step, type="primary")
 
     if st.session_state['prompt_chain']:
         st.subheader("Current Prompt Chain:")
-        for i, prompt in enumerate(st.session_state['prompt_chain']):
-            st.markdown(f'<div class="chain-container"><strong>Step {i+1}:</strong> {prompt}</div>', unsafe_allow_html=True)
-        st.button("Execute Full Chain", on_click=execute_chain, type="primary")
+        for i, step in enumerate(st.session_state['prompt_chain']):
+            uses = ", ".join(f"Step {dep+1}" for dep in step.inputs) or "no earlier steps"
+            st.markdown(f'<div class="chain-container"><strong>Step {i+1}:</strong> {step.prompt}<br><small>Uses: {uses}</small></div>', unsafe_allow_html=True)
+        with st.expander("✏️ Edit steps"):
+            for i, step in enumerate(st.session_state['prompt_chain']):
+                st.text_input(f"Step {i+1}", value=step.prompt, key=f"edit_prompt_{i}", on_change=update_step, args=(i,))
+                if i > 0:
+                    st.multiselect(f"Step {i+1} uses the output of:", options=list(range(1, i + 1)), default=[dep + 1 for dep in step.inputs], key=f"edit_inputs_{i}", on_change=update_step, args=(i,), format_func=lambda n: f"Step {n}")
+        reuse_outputs = st.checkbox("Reuse outputs of unchanged steps", value=True)
+        execute_clicked = st.button("Execute Full Chain", type="primary")
         st.button("Clear Chain", on_click=clear_chain)
+    else:
+        execute_clicked = False
 
-    if st.session_state['chain_output']:
+    if execute_clicked:
         st.subheader("Chain Output:")
-        st.markdown(f'<div class="chain-container"><pre style="white-space: pre-wrap;">{st.session_state["chain_output"]}</pre></div>', unsafe_allow_html=True)
-
-with col2:
-    lottie_json = load_lottieurl(LOTTIE_URL)
-    if lottie_json:
-        st_lottie(lottie_json, speed=1, height=300, key="collaboration_animation")
\ No newline at end of file
+        execute_chain(st.container(), reuse_outputs=reuse_outputs)
+    elif st.session_state['chain_results']:
+        st.subheader("Chain Output:")
+        for i, result in enumerate(st.session_state['chain_results']):
+            render_step_result(i, result, st.empty(), st.empty())
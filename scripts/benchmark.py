@@ -0,0 +1,233 @@
+"""Load-test the app's LLM code paths against the offline mock chat model.
+
+Run from the repository root:
+
+    python scripts/benchmark.py [--scenario chain ethics ...] [--concurrency 1 4 16 64]
+                                [--save results.json] [--baseline results.json]
+
+Every scenario drives the function a page calls (the services package, and the
+Playground's fan-out over stream_llm) with LLM_PROVIDER=mock, so the numbers include the scheduler, retries,
+telemetry and caches but no network. Each request uses a fresh prompt, so the
+response cache misses. `overhead` is p50 minus the time the mock itself sleeps, i.e.
+what the app adds on top of the provider.
+
+With --baseline, throughput drops and p95 increases beyond --tolerance are reported
+as regressions and the script exits with status 1.
+"""
+import argparse
+import contextvars
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+SCENARIOS = {
+    # name: (page the calls are attributed to, mock calls on the critical path)
+    "chain": ("Collaboration Hub", 3),
+    "ethics": ("Ethics Detector", 1),
+    "feedback": ("Career Tools", 1),
+    "playground": ("Prompt Playground", 1),
+    "coach": ("Prompt Coach", 1),
+}
+PLAYGROUND_MODELS = (("openai", "gpt-4o"), ("google", "gemini-1.5-pro-latest"))
+COACH_BATCH = 4
+
+_WORDS = (
+    "customer product launch budget team schedule design risk data report market user "
+    "privacy hiring policy model training feedback growth quality support region pricing"
+).split()
+
+
+def _text(seed, words=40):
+    rng = random.Random(seed)
+    return " ".join(rng.choice(_WORDS) for _ in range(words))
+
+
+def run_chain_request(i):
+    from services.chain import execute
+    steps = [
+        {"prompt": f"Outline a project about: {_text(i, 12)}"},
+        {"prompt": "Turn the outline into a task list.", "inputs": [0]},
+        {"prompt": "Summarize the plan and the task list.", "inputs": [0, 1]},
+    ]
+    failed = [r.error for r in execute(steps).results if r is None or r.error]
+    if failed:
+        raise RuntimeError(failed[0] or "Chain step skipped.")
+
+
+def run_ethics_request(i):
+    from services.ethics import analyze
+    analyze(_text(i))
+
+
+def run_feedback_request(i):
+    from services.interview import feedback
+    feedback(_text(i, 12), _text(-i - 1))
+
+
+def run_playground_request(i):
+    from utils.llm import get_llm
+    from utils.streaming import stream_llm
+    prompt = _text(i)
+    with ThreadPoolExecutor(max_workers=len(PLAYGROUND_MODELS)) as executor:
+        futures = [
+            executor.submit(contextvars.copy_context().run, stream_llm, get_llm(*model), prompt)
+            for model in PLAYGROUND_MODELS
+        ]
+        for future in futures:
+            future.result()
+
+
+def run_coach_request(i):
+    from services.coach import evaluate_many
+    prompts = {n: _text(i * COACH_BATCH + n, 20) for n in range(COACH_BATCH)}
+    for _, _, error in evaluate_many(prompts, cache=False):
+        if error:
+            raise RuntimeError(error)
+
+
+RUNNERS = {
+    "chain": run_chain_request,
+    "ethics": run_ethics_request,
+    "feedback": run_feedback_request,
+    "playground": run_playground_request,
+    "coach": run_coach_request,
+}
+
+
+def run_level(scenario, concurrency, requests, offset):
+    """Run `requests` requests `concurrency` at a time; returns a result row."""
+    from utils.request_context import set_page
+    from utils.telemetry import percentile
+    page, _ = SCENARIOS[scenario]
+    runner = RUNNERS[scenario]
+
+    def one(i):
+        # One session per concurrent user, so the scheduler queues them fairly.
+        set_page(page, session=f"bench-{i % concurrency}")
+        start = time.perf_counter()
+        try:
+            runner(offset + i)
+            error = None
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+        return time.perf_counter() - start, error
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        outcomes = list(executor.map(lambda i: contextvars.copy_context().run(one, i), range(requests)))
+    elapsed = time.perf_counter() - start
+    latencies = sorted(latency for latency, error in outcomes if error is None)
+    errors = [error for _, error in outcomes if error]
+    return {
+        "scenario": scenario,
+        "concurrency": concurrency,
+        "requests": requests,
+        "errors": len(errors),
+        "first_error": errors[0] if errors else None,
+        "throughput": len(latencies) / elapsed if elapsed else 0.0,
+        "p50": percentile(latencies, 50),
+        "p95": percentile(latencies, 95),
+        "p99": percentile(latencies, 99),
+    }
+
+
+def mock_seconds(args):
+    """How long one mock call sleeps: latency plus streaming its tokens."""
+    return args.latency + args.response_tokens / args.tokens_per_second
+
+
+def _fmt(value, spec=".3f"):
+    return "-" if value is None else format(value, spec)
+
+
+def print_table(rows, ideal):
+    print(f"{'scenario':<11}{'conc':>5}{'reqs':>6}{'errs':>6}{'req/s':>9}{'p50':>8}{'p95':>8}{'p99':>8}{'overhead':>10}")
+    for row in rows:
+        serial = SCENARIOS[row["scenario"]][1]
+        overhead = None if row["p50"] is None else row["p50"] - serial * ideal
+        print(
+            f"{row['scenario']:<11}{row['concurrency']:>5}{row['requests']:>6}{row['errors']:>6}"
+            f"{_fmt(row['throughput'], '.2f'):>9}{_fmt(row['p50']):>8}{_fmt(row['p95']):>8}"
+            f"{_fmt(row['p99']):>8}{_fmt(overhead):>10}"
+        )
+    for row in rows:
+        if row["first_error"]:
+            print(f"{row['scenario']} x{row['concurrency']}: {row['errors']} errors, e.g. {row['first_error']}")
+
+
+def compare(rows, baseline, tolerance):
+    """Human-readable regressions of `rows` against a saved baseline."""
+    previous = {(row["scenario"], row["concurrency"]): row for row in baseline["results"]}
+    regressions = []
+    for row in rows:
+        old = previous.get((row["scenario"], row["concurrency"]))
+        if old is None:
+            continue
+        label = f"{row['scenario']} x{row['concurrency']}"
+        if old["throughput"] and row["throughput"] < old["throughput"] * (1 - tolerance):
+            regressions.append(f"{label}: throughput {old['throughput']:.2f} -> {row['throughput']:.2f} req/s")
+        if old["p95"] and row["p95"] is not None and row["p95"] > old["p95"] * (1 + tolerance):
+            regressions.append(f"{label}: p95 {old['p95']:.3f} -> {row['p95']:.3f}s")
+        if row["errors"] > old["errors"]:
+            regressions.append(f"{label}: errors {old['errors']} -> {row['errors']}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scenario", nargs="+", choices=list(SCENARIOS), default=list(SCENARIOS))
+    parser.add_argument("--concurrency", nargs="+", type=int, default=[1, 4, 16, 64])
+    parser.add_argument("--requests", type=int, default=32, help="requests per level (at least the concurrency)")
+    parser.add_argument("--latency", type=float, default=0.2, help="mock seconds before the first token")
+    parser.add_argument("--tokens-per-second", type=float, default=200.0)
+    parser.add_argument("--response-tokens", type=int, default=60)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="mock 429/timeout probability per call")
+    parser.add_argument("--save", help="write the results to this JSON file")
+    parser.add_argument("--baseline", help="compare against results saved with --save")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed relative change before a regression")
+    args = parser.parse_args()
+
+    # Configure before anything in utils reads its settings, and keep the benchmark
+    # away from the app's own response cache and telemetry history.
+    scratch = tempfile.mkdtemp(prefix="benchmark-")
+    os.environ.update(
+        LLM_PROVIDER="mock",
+        LLM_CACHE_PATH=os.path.join(scratch, "llm_cache.sqlite"),
+        TELEMETRY_PATH=os.path.join(scratch, "telemetry.sqlite"),
+        MOCK_LLM_LATENCY=str(args.latency),
+        MOCK_LLM_TOKENS_PER_SECOND=str(args.tokens_per_second),
+        MOCK_LLM_RESPONSE_TOKENS=str(args.response_tokens),
+        MOCK_LLM_ERROR_RATE=str(args.error_rate),
+    )
+    sys.path.insert(0, str(ROOT))
+
+    rows, offset = [], 0
+    for scenario in args.scenario:
+        for concurrency in args.concurrency:
+            requests = max(args.requests, concurrency)
+            rows.append(run_level(scenario, concurrency, requests, offset))
+            offset += requests
+    print_table(rows, mock_seconds(args))
+
+    if args.save:
+        settings = {key: value for key, value in vars(args).items() if key not in ("save", "baseline")}
+        Path(args.save).write_text(json.dumps({"settings": settings, "results": rows}, indent=2), encoding="utf-8")
+        print(f"Saved results to {args.save}")
+    if args.baseline:
+        regressions = compare(rows, json.loads(Path(args.baseline).read_text(encoding="utf-8")), args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            sys.exit(1)
+        print(f"No regressions beyond {args.tolerance:.0%} of the baseline.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""Download the page animations listed in utils.lottie.ANIMATIONS into assets/lottie/.
+
+Run from the repository root whenever an animation URL changes:
+
+    python scripts/fetch_lottie.py [--force]
+
+The app fetches a missing animation in the background too, showing the placeholder
+until it arrives; running this ahead of time means pages show the real one at once.
+"""
+import argparse
+import json
+import sys
+from pathlib import Path
+
+import requests
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from utils.lottie import ANIMATIONS, ASSET_DIR, asset_path  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--force", action="store_true", help="re-download animations that are already vendored")
+    parser.add_argument("--timeout", type=float, default=10.0, help="per-request timeout in seconds")
+    args = parser.parse_args()
+
+    ASSET_DIR.mkdir(parents=True, exist_ok=True)
+    failed = 0
+    for name, url in ANIMATIONS.items():
+        path = asset_path(name)
+        if path.exists() and not args.force:
+            print(f"{name}: already vendored")
+            continue
+        try:
+            response = requests.get(url, timeout=args.timeout)
+            response.raise_for_status()
+            animation = response.json()
+        except (requests.RequestException, ValueError) as e:
+            print(f"{name}: failed ({e})", file=sys.stderr)
+            failed += 1
+            continue
+        path.write_text(json.dumps(animation, separators=(",", ":")), encoding="utf-8")
+        print(f"{name}: {path.stat().st_size / 1024:.0f} KB")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,78 @@
+"""Report how long each page's top-level imports take on a cold interpreter.
+
+Run from the repository root:
+
+    python scripts/import_report.py [--top 5] [PAGE ...]
+
+Each page's module-level import statements are executed in a fresh
+`python -X importtime` process, so the numbers are what a cold Streamlit
+navigation pays before the page can render anything. Heavy libraries (provider
+SDKs, torch/diffusers, pandas, python-docx) should only show up here if a page
+really needs them before first paint.
+"""
+import argparse
+import ast
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def page_files():
+    return [ROOT / "Home.py", *sorted((ROOT / "pages").glob("*.py"))]
+
+
+def top_level_imports(path):
+    """Source of the import statements at module level (not inside functions)."""
+    source = path.read_text(encoding="utf-8")
+    tree = ast.parse(source)
+    return "\n".join(
+        ast.get_source_segment(source, node)
+        for node in tree.body
+        if isinstance(node, (ast.Import, ast.ImportFrom))
+    )
+
+
+def measure(code):
+    """({top-level module: cumulative microseconds}, error) for running `code` cold."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=ROOT, capture_output=True, text=True,
+    )
+    modules = {}
+    for line in proc.stderr.splitlines():
+        # "import time: <self us> | <cumulative us> | <name, indented by nesting depth>"
+        if not line.startswith("import time:"):
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if cumulative.strip().isdigit() and not name.startswith("  "):
+            modules[name.strip()] = int(cumulative)
+    error = None
+    if proc.returncode:
+        error = (proc.stderr.strip().splitlines() or ["failed"])[-1]
+    return modules, error
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("pages", nargs="*", help="page files to measure (default: Home.py and pages/*.py)")
+    parser.add_argument("--top", type=int, default=5, help="slowest packages to list per page")
+    args = parser.parse_args()
+
+    paths = [Path(p).resolve() for p in args.pages] or page_files()
+    # Modules the interpreter loads at startup are not the page's cost.
+    startup, _ = measure("pass")
+    print(f"{'page':<40} {'imports':>9}  slowest")
+    for path in paths:
+        modules, error = measure(top_level_imports(path))
+        costs = {name: us for name, us in modules.items() if name not in startup}
+        slowest = sorted(costs.items(), key=lambda item: -item[1])[:args.top]
+        detail = ", ".join(f"{name} {us / 1000:.0f}ms" for name, us in slowest)
+        if error:
+            detail = f"{detail} [{error}]".lstrip()
+        print(f"{path.name:<40} {sum(costs.values()) / 1000:>7.0f}ms  {detail}")
+
+
+if __name__ == "__main__":
+    main()
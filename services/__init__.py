@@ -0,0 +1,11 @@
+"""The app's features as plain Python, independent of Streamlit.
+
+Each module owns one feature: the prompts it sends, the model it uses and how its
+results are cached. Pages are views over these functions, and the same calls can be
+made from worker threads, scripts or an API server.
+
+Every feature has a blocking entry point that streams tokens to an optional
+`on_token` callback, an `*_async` coroutine that runs it on a worker thread, and a
+`*_stream` variant that yields the tokens to an `async for` loop (see
+services.aio.TokenStream). Invalid input raises ValueError; model errors propagate.
+"""
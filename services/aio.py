@@ -0,0 +1,66 @@
+"""Async adapters for the blocking service calls.
+
+LangChain clients, the response cache and the request scheduler are all thread-based,
+so the coroutines run the same blocking code on asyncio's default executor.
+`asyncio.to_thread` copies context variables, so calls stay attributed to the caller's
+page and session (utils.request_context).
+"""
+import asyncio
+import functools
+import threading
+
+_DONE = object()
+
+
+class StreamCancelled(Exception):
+    """Raised inside a TokenStream's call at its next token once the stream is cancelled."""
+
+
+class TokenStream:
+    """Async iterator over what a blocking call passes to its `on_token` callback.
+
+    `func(*args, on_token=..., **kwargs)` runs on a worker thread. Each item is the
+    callback's argument (a token), or a tuple of its arguments when there are several
+    (chains report `(step, token)`). When iteration ends `result` holds the call's
+    return value; an exception raised by the call is raised from the `async for`.
+    A consumer that stops early should `cancel()` the stream, which stops the call at
+    its next token, and can use `when_done` to learn when its thread is free again.
+    """
+
+    def __init__(self, func, *args, **kwargs):
+        self._call = functools.partial(func, *args, **kwargs)
+        self._cancelled = threading.Event()
+        self._task = None
+        self.result = None
+
+    def cancel(self):
+        self._cancelled.set()
+
+    def when_done(self, callback):
+        """Call `callback()` once the call has finished (right away if it has), consuming its outcome."""
+        def done(task):
+            if not task.cancelled():
+                task.exception()
+            callback()
+        if self._task is None:
+            callback()
+        elif self._task.done():
+            done(self._task)
+        else:
+            self._task.add_done_callback(done)
+
+    async def __aiter__(self):
+        loop = asyncio.get_running_loop()
+        items = asyncio.Queue()
+
+        def on_token(*args):
+            if self._cancelled.is_set():
+                raise StreamCancelled("The stream was cancelled.")
+            loop.call_soon_threadsafe(items.put_nowait, args[0] if len(args) == 1 else args)
+
+        task = self._task = asyncio.ensure_future(asyncio.to_thread(self._call, on_token=on_token))
+        # Done callbacks run on the loop after every token callback queued before them.
+        task.add_done_callback(lambda _: items.put_nowait(_DONE))
+        while (item := await items.get()) is not _DONE:
+            yield item
+        self.result = await task
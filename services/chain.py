@@ -0,0 +1,63 @@
+"""Collaboration Hub: run prompt chains (see utils.chain for how steps are scheduled)."""
+import asyncio
+import time
+from dataclasses import dataclass
+
+from services.aio import TokenStream
+from utils.chain import ChainStep, run_chain, validate_chain
+from utils.llm import get_llm
+
+MODEL = ("openai", "gpt-4o", 0.5)
+MAX_MEMO_ENTRIES = 200
+
+
+@dataclass
+class ChainRun:
+    results: list  # StepResult per step, None for steps skipped after a failure
+    duration: float
+
+    @property
+    def ran(self):
+        return [r for r in self.results if r and not r.reused and not r.error]
+
+    @property
+    def reused(self):
+        return sum(1 for r in self.results if r and r.reused)
+
+    @property
+    def tokens(self):
+        return sum((r.input_tokens or 0) + (r.output_tokens or 0) for r in self.ran)
+
+    @property
+    def summary(self) -> str:
+        return f"Chain finished in {self.duration:.2f}s · {len(self.ran)} steps run, {self.reused} reused · {self.tokens} tokens"
+
+
+def as_steps(steps):
+    """ChainSteps from ChainSteps or dicts like `{"prompt": ..., "inputs": [0]}`."""
+    return [step if isinstance(step, ChainStep) else ChainStep(step["prompt"], list(step.get("inputs", []))) for step in steps]
+
+
+def execute(steps, memo=None, on_token=None, on_result=None, llm=None):
+    """Run the chain and return a ChainRun; see utils.chain.run_chain for `memo` and the callbacks.
+
+    Raises ValueError if the steps don't form a valid chain.
+    """
+    start = time.perf_counter()
+    results = run_chain(llm or get_llm(*MODEL), as_steps(steps), memo=memo, on_token=on_token, on_result=on_result)
+    return ChainRun(results, time.perf_counter() - start)
+
+
+def trim_memo(memo, max_entries=MAX_MEMO_ENTRIES):
+    # Dicts keep insertion order, so this drops the oldest outputs first.
+    while len(memo) > max_entries:
+        memo.pop(next(iter(memo)))
+
+
+async def execute_async(steps, memo=None, llm=None):
+    return await asyncio.to_thread(execute, steps, memo=memo, llm=llm)
+
+
+def execute_stream(steps, memo=None, llm=None):
+    """TokenStream of `(step index, token)` pairs."""
+    return TokenStream(execute, steps, memo=memo, llm=llm)
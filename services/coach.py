@@ -0,0 +1,51 @@
+"""Prompt Coach: grade prompts one at a time (streamed) or in bulk (see utils.coach)."""
+import asyncio
+
+from services.aio import TokenStream
+from utils.coach import coach_messages, evaluate_batch, parse_score
+from utils.llm import get_llm
+from utils.streaming import stream_llm
+
+MODEL = ("openai", "gpt-4o", 0.3)
+
+
+def evaluate(prompt, on_token=None, llm=None):
+    """Stream the coach's feedback on `prompt` and return its StreamResult (score: parse_score)."""
+    if not prompt or not prompt.strip():
+        raise ValueError("Please enter a prompt to evaluate.")
+    return stream_llm(llm or get_llm(*MODEL), coach_messages(prompt), on_token=on_token, cache=True)
+
+
+def evaluate_many(prompts, max_concurrency=8, llm=None, cache=True):
+    """Yield `(key, feedback, error)` for each of `prompts` (a dict) as it completes."""
+    return evaluate_batch(llm or get_llm(*MODEL), prompts, max_concurrency=max_concurrency, cache=cache)
+
+
+async def evaluate_async(prompt, llm=None):
+    return await asyncio.to_thread(evaluate, prompt, llm=llm)
+
+
+def evaluate_all(prompts, max_concurrency=8, llm=None, cache=True, on_token=None):
+    """`{key: (feedback, error)}` for every prompt, calling `on_token(key, feedback, error)` as each completes.
+
+    The callback is named like the streaming calls' so a TokenStream can report results as they arrive.
+    """
+    results = {}
+    for key, feedback, error in evaluate_many(prompts, max_concurrency, llm, cache):
+        results[key] = (feedback, error)
+        if on_token:
+            on_token(key, feedback, error)
+    return results
+
+
+async def evaluate_many_async(prompts, max_concurrency=8, llm=None, cache=True):
+    return await asyncio.to_thread(evaluate_all, prompts, max_concurrency, llm, cache)
+
+
+def evaluate_stream(prompt, llm=None):
+    return TokenStream(evaluate, prompt, llm=llm)
+
+
+def evaluate_many_stream(prompts, max_concurrency=8, llm=None, cache=True):
+    """TokenStream of `(key, feedback, error)` per prompt, in completion order."""
+    return TokenStream(evaluate_all, prompts, max_concurrency, llm, cache)
@@ -0,0 +1,32 @@
+"""Ethics & Bias Detector: review a prompt or generated text for ethical concerns."""
+import asyncio
+
+from services.aio import TokenStream
+from utils.llm import get_llm
+from utils.prompts import ETHICS_SYSTEM_PROMPT
+from utils.streaming import stream_llm
+
+MODEL = ("openai", "gpt-4o", 0.4)
+
+
+def ethics_messages(text):
+    return [{"role": "system", "content": ETHICS_SYSTEM_PROMPT}, {"role": "user", "content": text}]
+
+
+def analyze(text, on_token=None, llm=None):
+    """Stream an analysis of `text` and return its StreamResult.
+
+    Only an exact repeat (up to whitespace) is answered from the response cache: texts
+    that share most of their words can still differ in meaning, e.g. by a negation.
+    """
+    if not text or not text.strip():
+        raise ValueError("Please enter text to analyze.")
+    return stream_llm(llm or get_llm(*MODEL), ethics_messages(text), on_token=on_token, cache=True)
+
+
+async def analyze_async(text, llm=None):
+    return await asyncio.to_thread(analyze, text, llm=llm)
+
+
+def analyze_stream(text, llm=None):
+    return TokenStream(analyze, text, llm=llm)
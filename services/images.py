@@ -0,0 +1,88 @@
+"""AI Image Lab: queue Stable Diffusion jobs and collect their images.
+
+Generation runs in the background worker processes of utils.image_worker; these
+functions only queue jobs and read their status and the image cache, so they return
+immediately. `wait` and `generate_async` poll until a job finishes.
+"""
+import asyncio
+import random
+import time
+
+from utils.image_worker import DONE, MAX_SEED, batch_params, generation_params, get_image_worker
+
+POLL_INTERVAL = 0.5
+
+
+def submit(owner, prompts, negative_prompt="", guidance_scale=7.5, seed=None, variations=1, preview=True, steps=50):
+    """Queue `variations` images of each prompt for `owner` and return the job id.
+
+    `seed` defaults to a random one. Raises ValueError without a prompt, and
+    utils.image_worker.WorkerBusy if the batch is too large or the queue is full.
+    """
+    if isinstance(prompts, str):
+        prompts = [prompts]
+    prompts = [prompt.strip() for prompt in prompts if prompt and prompt.strip()]
+    if not prompts:
+        raise ValueError("Please enter a prompt to generate an image.")
+    if seed is None:
+        seed = random.randint(0, MAX_SEED)
+    items = batch_params(prompts, negative_prompt, guidance_scale, seed, variations=variations, preview=preview, steps=steps)
+    return get_image_worker().submit(owner, items)
+
+
+def render_full_quality(owner, job, steps=50):
+    """Queue a full-quality re-render of a preview job; same prompts and seeds, so the compositions carry over."""
+    items = [generation_params(p["prompt"], p["negative_prompt"], p["guidance_scale"], p["seed"], steps=steps) for p in job.items]
+    return get_image_worker().submit(owner, items)
+
+
+def get_job(job_id):
+    """The ImageJob, or None once it has been forgotten."""
+    return get_image_worker().get(job_id)
+
+
+def images(job):
+    """PNG bytes for each image of a finished job (None for images evicted from the cache)."""
+    cache = get_image_worker().cache
+    return [cache.get(key) for key in job.keys]
+
+
+def wait(job_id, timeout=None):
+    """Block until the job has finished and return it.
+
+    Raises RuntimeError if the worker no longer knows the job, and TimeoutError after `timeout` seconds.
+    """
+    deadline = None if timeout is None else time.monotonic() + timeout
+    while True:
+        job = get_job(job_id)
+        if job is None:
+            # Dropped from the worker's finished-job history before we saw it finish.
+            raise RuntimeError(f"Image job {job_id} is no longer known to the worker.")
+        if job.finished:
+            return job
+        if deadline is not None and time.monotonic() >= deadline:
+            raise TimeoutError(f"Image job {job_id} is still {job.status}.")
+        time.sleep(POLL_INTERVAL)
+
+
+async def generate_async(owner, prompts, timeout=None, **options):
+    """Queue a job (see `submit`), wait for it without blocking the loop, and return its images.
+
+    Raises RuntimeError if generation fails or is cancelled, and TimeoutError after `timeout` seconds.
+    """
+    job_id = submit(owner, prompts, **options)
+    deadline = None if timeout is None else time.monotonic() + timeout
+    while True:
+        job = get_job(job_id)
+        if job is None:
+            # Dropped from the worker's finished-job history before we saw it finish.
+            raise RuntimeError(f"Image job {job_id} is no longer known to the worker.")
+        if job.finished:
+            break
+        if deadline is not None and time.monotonic() >= deadline:
+            get_image_worker().cancel(job_id)
+            raise TimeoutError(f"Image job {job_id} did not finish within {timeout}s.")
+        await asyncio.sleep(POLL_INTERVAL)
+    if job.status != DONE:
+        raise RuntimeError(job.error or f"Image job {job_id} was {job.status}.")
+    return await asyncio.to_thread(images, job)
@@ -0,0 +1,52 @@
+"""Career Tools' interview simulator: practice questions and feedback on answers."""
+import asyncio
+import random
+
+from services.aio import TokenStream
+from utils.llm import get_llm
+from utils.prompts import INTERVIEW_FEEDBACK_TEMPLATE
+from utils.streaming import stream_llm
+from utils.templates import render_template
+
+MODEL = ("openai", "gpt-4o", 0.6)
+
+QUESTIONS = {
+    "Behavioral": [
+        "Tell me about a time you failed.",
+        "Describe a situation where you had to work with a difficult team member.",
+        "Tell me about a time you had to learn something quickly.",
+    ],
+    "Technical": [
+        "Explain the concept of prompt engineering.",
+        "What are the benefits of using virtual environments in Python?",
+        "Describe the difference between generative and discriminative AI models.",
+    ],
+    "Situational": [
+        "How would you approach a project with a very tight deadline?",
+        "Imagine a client is unhappy with the results of your work. How would you handle this?",
+        "Describe how you would explain AI to someone with no technical background.",
+    ],
+}
+TOPICS = list(QUESTIONS)
+
+
+def random_question(topic, rng=random):
+    if topic not in QUESTIONS:
+        raise ValueError(f"Unknown interview topic: {topic}")
+    return rng.choice(QUESTIONS[topic])
+
+
+def feedback(question, answer, on_token=None, llm=None):
+    """Stream feedback on `answer` to `question` and return its StreamResult."""
+    if not answer or not answer.strip():
+        raise ValueError("Please enter your answer first.")
+    prompt = render_template(INTERVIEW_FEEDBACK_TEMPLATE, Question=question, Answer=answer)
+    return stream_llm(llm or get_llm(*MODEL), prompt, on_token=on_token)
+
+
+async def feedback_async(question, answer, llm=None):
+    return await asyncio.to_thread(feedback, question, answer, llm=llm)
+
+
+def feedback_stream(question, answer, llm=None):
+    return TokenStream(feedback, question, answer, llm=llm)
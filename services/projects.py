@@ -0,0 +1,64 @@
+"""Mini Project Builder: small generators driven by prompt templates."""
+import asyncio
+from dataclasses import dataclass
+from io import BytesIO
+
+from services.aio import TokenStream
+from utils.llm import get_llm
+from utils.prompts import DOCSTRING_TEMPLATE, LINKEDIN_BIO_TEMPLATE, STORY_IDEAS_TEMPLATE
+from utils.streaming import stream_llm
+from utils.templates import render_template
+
+MODEL = ("openai", "gpt-4o", 0.7)
+
+
+@dataclass(frozen=True)
+class Project:
+    title: str
+    template: str
+    fields: tuple  # the template's placeholders
+    cache: bool  # creative projects skip the cache so every run gives new ideas
+
+
+PROJECTS = {
+    "linkedin_bio": Project("LinkedIn 'About' Section", LINKEDIN_BIO_TEMPLATE, ("Role", "Skills", "Tone"), cache=True),
+    "docstring": Project("Code Docstring Generator", DOCSTRING_TEMPLATE, ("Code",), cache=True),
+    "story_ideas": Project("Short Story Idea", STORY_IDEAS_TEMPLATE, ("Genre", "Character", "Setting"), cache=False),
+}
+LINKEDIN_TONES = ["Professional", "Enthusiastic", "Story-telling"]
+
+
+def _project(name):
+    if name not in PROJECTS:
+        raise ValueError(f"Unknown project: {name}")
+    return PROJECTS[name]
+
+
+def build_prompt(project, values):
+    """The filled-in prompt for `project`; raises TemplateError if `values` don't fit it."""
+    return render_template(_project(project).template, values)
+
+
+def generate(project, values, on_token=None, llm=None):
+    """Stream the output of `project` for `values` (placeholder -> text) and return its StreamResult."""
+    prompt = build_prompt(project, values)
+    return stream_llm(llm or get_llm(*MODEL), prompt, on_token=on_token, cache=_project(project).cache)
+
+
+async def generate_async(project, values, llm=None):
+    return await asyncio.to_thread(generate, project, values, llm=llm)
+
+
+def generate_stream(project, values, llm=None):
+    return TokenStream(generate, project, values, llm=llm)
+
+
+def docx_bytes(text):
+    """`text` as a one-paragraph Word document."""
+    # python-docx is only loaded when a document is actually requested.
+    from docx import Document
+    doc = Document()
+    doc.add_paragraph(text)
+    bio = BytesIO()
+    doc.save(bio)
+    return bio.getvalue()
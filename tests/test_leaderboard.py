@@ -0,0 +1,22 @@
+"""Ranks in utils.leaderboard, which are read from per-score counts."""
+from utils.leaderboard import Leaderboard
+
+
+def test_rank_counts_players_with_higher_scores():
+    board = Leaderboard(":memory:")
+    # Seeded with scores 220, 180 and 150.
+    board.add_points("a", "Ada", 200)
+    board.add_points("b", "Grace", 200)
+    assert board.rank("a") == (2, 200)
+    assert board.rank("b") == (2, 200)
+    assert board.rank("seed-3") == (4, 180)
+
+
+def test_rank_follows_score_changes():
+    board = Leaderboard(":memory:")
+    board.add_points("a", "Ada", 100)
+    assert board.rank("a") == (4, 100)
+    board.add_points("a", "Ada", 200)
+    assert board.rank("a") == (1, 300)
+    assert board.rank("seed-2") == (2, 220)
+    assert board.rank("missing") is None
@@ -0,0 +1,53 @@
+"""Client retries in utils.llm, exercised against the offline mock model."""
+import pytest
+
+from utils import llm
+from utils.mock_llm import MockChatModel, MockRateLimitError
+
+
+@pytest.fixture
+def mock_env(monkeypatch):
+    monkeypatch.setenv("LLM_PROVIDER", "mock")
+    monkeypatch.setenv("MOCK_LLM_LATENCY", "0")
+    monkeypatch.setenv("MOCK_LLM_TOKENS_PER_SECOND", "100000")
+    monkeypatch.setenv("TELEMETRY", "0")
+    monkeypatch.setattr(llm, "_stream_backoff", lambda attempt, exc: 0.0)
+
+
+def test_stream_retries_a_429_before_the_first_chunk(mock_env, monkeypatch):
+    calls = []
+
+    def fail_once(self):
+        calls.append(1)
+        if len(calls) == 1:
+            raise MockRateLimitError("Mock rate limit exceeded.")
+
+    monkeypatch.setattr(MockChatModel, "_maybe_fail", fail_once)
+    client = llm.get_llm("mock", "stream-retry", fallback=False)
+    text = "".join(chunk.content for chunk in client.stream("Explain prompt engineering."))
+    assert text
+    assert len(calls) == 2
+
+
+def test_stream_gives_up_after_max_attempts(mock_env, monkeypatch):
+    def always_fail(self):
+        raise MockRateLimitError("Mock rate limit exceeded.")
+
+    monkeypatch.setattr(MockChatModel, "_maybe_fail", always_fail)
+    client = llm.get_llm("mock", "stream-retry-exhausted", fallback=False)
+    with pytest.raises(MockRateLimitError):
+        list(client.stream("Explain prompt engineering."))
+
+
+def test_invoke_does_not_retry_other_errors(mock_env, monkeypatch):
+    calls = []
+
+    def fail(self):
+        calls.append(1)
+        raise KeyError("not retryable")
+
+    monkeypatch.setattr(MockChatModel, "_maybe_fail", fail)
+    client = llm.get_llm("mock", "invoke-no-retry", fallback=False)
+    with pytest.raises(KeyError):
+        client.invoke("Explain prompt engineering.")
+    assert len(calls) == 1
\ No newline at end of file
@@ -0,0 +1,66 @@
+"""Response caching for the Ethics Detector and Prompt Coach."""
+import pytest
+
+from services import coach, ethics
+from utils import llm_cache
+
+# Near-duplicates that differ in meaning; both pairs pass SEMANTIC_THRESHOLD.
+HIRING_GUIDE = (
+    "Our hiring guide says candidates from the northern region are reliable, punctual and easy to manage, "
+    "so recruiters should prioritise their applications for the night shift roles."
+)
+WELCOME_EMAIL = (
+    "Write a friendly welcome email for new engineers joining the Berlin office next Monday, mentioning "
+    "the onboarding buddy program, the security badge pickup and the team lunch."
+)
+
+
+class Chunk:
+    usage_metadata = None
+
+    def __init__(self, content):
+        self.content = content
+
+
+class FakeModel:
+    model_name = "fake-model"
+    temperature = 0.4
+
+    def __init__(self):
+        self.calls = 0
+
+    def stream(self, messages):
+        self.calls += 1
+        yield Chunk(f"answer {self.calls}")
+
+
+@pytest.fixture(autouse=True)
+def response_cache(tmp_path, monkeypatch):
+    cache = llm_cache.ResponseCache(path=str(tmp_path / "responses.sqlite"))
+    monkeypatch.setattr(llm_cache, "_cache", cache)
+    return cache
+
+
+def test_ethics_does_not_reuse_an_analysis_for_a_negated_text():
+    model = FakeModel()
+    ethics.analyze(HIRING_GUIDE, llm=model)
+    result = ethics.analyze(HIRING_GUIDE.replace("are reliable", "are not reliable"), llm=model)
+    assert not result.cached
+    assert model.calls == 2
+
+
+def test_ethics_reuses_an_exact_repeat():
+    model = FakeModel()
+    first = ethics.analyze("Hire the best candidate regardless of age.", llm=model)
+    again = ethics.analyze("Hire the best  candidate regardless of age.", llm=model)
+    assert again.cached
+    assert again.text == first.text
+    assert model.calls == 1
+
+
+def test_coach_does_not_reuse_a_grade_for_a_different_group():
+    model = FakeModel()
+    coach.evaluate(WELCOME_EMAIL, llm=model)
+    result = coach.evaluate(WELCOME_EMAIL.replace("Berlin", "Paris"), llm=model)
+    assert not result.cached
+    assert model.calls == 2
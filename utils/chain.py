@@ -0,0 +1,135 @@
+"""Prompt chains run as a dependency graph.
+
+Each step names the earlier steps whose outputs it needs. A step starts as soon as
+those finish, so independent branches run concurrently, and its prompt carries only
+its declared inputs instead of the whole history of the chain.
+"""
+import contextvars
+import hashlib
+import json
+import queue
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+
+from utils.llm_cache import model_settings
+from utils.streaming import stream_llm
+
+
+@dataclass
+class ChainStep:
+    prompt: str
+    inputs: list = field(default_factory=list)  # indices of earlier steps
+
+
+@dataclass
+class StepResult:
+    output: str = ""
+    duration: float = 0.0
+    ttft: float | None = None
+    input_tokens: int | None = None
+    output_tokens: int | None = None
+    reused: bool = False
+    error: str | None = None
+
+    @property
+    def stats(self) -> str:
+        if self.reused:
+            return "♻️ Reused previous output"
+        tokens = f"{self.input_tokens or 0} in / {self.output_tokens or 0} out tokens"
+        first = f"{self.ttft:.2f}s" if self.ttft is not None else "n/a"
+        return f"⏱️ First token {first} · Total {self.duration:.2f}s · {tokens}"
+
+
+def validate_chain(steps):
+    for i, step in enumerate(steps):
+        for dep in step.inputs:
+            if not 0 <= dep < i:
+                raise ValueError(f"Step {i+1} can only use outputs of earlier steps (got step {dep+1}).")
+
+
+def build_step_prompt(index, step, outputs):
+    parts = [f"Output of step {dep+1}:\n{outputs[dep]}" for dep in step.inputs]
+    parts.append(f"Step {index+1}: {step.prompt}")
+    return "\n\n".join(parts)
+
+
+def step_key(llm, prompt):
+    """Memo key for a fully built step prompt; it embeds upstream outputs, so edits propagate downstream."""
+    return hashlib.sha256(json.dumps([model_settings(llm), prompt]).encode("utf-8")).hexdigest()
+
+
+def run_chain(llm, steps, memo=None, on_token=None, on_result=None, max_workers=4):
+    """Execute `steps`, returning one StepResult per step (None for steps skipped after a failure).
+
+    `memo` maps step keys to earlier StepResults; matching steps are reused without an
+    LLM call and new results are written back. `on_token(index, token)` and
+    `on_result(index, result)` are called on the calling thread, so they may update
+    Streamlit elements.
+    """
+    validate_chain(steps)
+    results = [None] * len(steps)
+    outputs = {}
+    failed = set()
+    tokens = queue.Queue()
+
+    def run_step(index, prompt):
+        result = stream_llm(llm, prompt, on_token=lambda token: tokens.put((index, token)))
+        return StepResult(result.text, result.duration, result.ttft, result.input_tokens, result.output_tokens)
+
+    def finish(index, result):
+        results[index] = result
+        if result.error:
+            failed.add(index)
+        else:
+            outputs[index] = result.output
+        if on_result:
+            on_result(index, result)
+
+    def drain():
+        while True:
+            try:
+                index, token = tokens.get_nowait()
+            except queue.Empty:
+                return
+            if on_token:
+                on_token(index, token)
+
+    remaining = set(range(len(steps)))
+    running = {}
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        while remaining or running:
+            # Ascending order means a step sees its dependencies' outcomes from this same pass.
+            for index in sorted(remaining):
+                deps = steps[index].inputs
+                if any(dep in failed for dep in deps):
+                    # Skip everything downstream of a failed step.
+                    remaining.discard(index)
+                    failed.add(index)
+                    continue
+                if not all(dep in outputs for dep in deps):
+                    continue
+                remaining.discard(index)
+                prompt = build_step_prompt(index, steps[index], outputs)
+                key = step_key(llm, prompt)
+                if memo is not None and key in memo:
+                    # Re-insert so dict order doubles as least-recently-used order for callers that trim.
+                    cached = memo[key] = memo.pop(key)
+                    finish(index, StepResult(cached.output, input_tokens=cached.input_tokens, output_tokens=cached.output_tokens, reused=True))
+                    continue
+                # A copied context keeps the calls attributed to the calling page (utils.telemetry).
+                running[executor.submit(contextvars.copy_context().run, run_step, index, prompt)] = (index, key)
+            if not running:
+                break
+            done, _ = wait(running, timeout=0.1, return_when=FIRST_COMPLETED)
+            drain()
+            for future in done:
+                index, key = running.pop(future)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    finish(index, StepResult(error=f"{type(e).__name__}: {e}"))
+                    continue
+                if memo is not None:
+                    memo[key] = result
+                finish(index, result)
+    return results
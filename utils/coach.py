@@ -0,0 +1,79 @@
+"""Prompt Coach evaluation, shared by the single-prompt view and batch mode."""
+import random
+import re
+import time
+
+from utils.llm import is_rate_limited, retry_after
+from utils.llm_cache import get_response_cache, model_settings
+
+COACH_SYSTEM_PROMPT = """You are an expert prompt engineering coach. Evaluate the user's prompt for clarity, specificity, context and output format. Respond in Markdown with:
+1. A one-sentence verdict.
+2. A table rating Clarity, Specificity, Context and Format from 1 to 10, with a short reason for each.
+3. Two or three concrete suggestions for improvement.
+4. An improved version of the prompt.
+Finish with a final line in exactly this form: Overall Score: N/10"""
+
+_SCORE = re.compile(r"Overall Score:\s*\**\s*(\d+(?:\.\d+)?)\s*/\s*10", re.IGNORECASE)
+
+MAX_BACKOFF = 60.0
+
+
+def coach_messages(prompt):
+    return [{"role": "system", "content": COACH_SYSTEM_PROMPT}, {"role": "user", "content": prompt}]
+
+
+def parse_score(feedback):
+    """Overall score out of 10 from the coach's feedback, or None if it is missing.
+
+    The coach often quotes the prompt it graded, which may contain a score of its own,
+    so only the last one (the coach's final line) counts.
+    """
+    scores = _SCORE.findall(feedback or "")
+    return float(scores[-1]) if scores else None
+
+
+def _backoff(attempt, exc):
+    # Full jitter keeps many sessions that were throttled together from retrying together.
+    return retry_after(exc) or random.uniform(0, min(MAX_BACKOFF, 2 ** attempt))
+
+
+def evaluate_batch(llm, prompts, max_concurrency=8, max_retries=5, cache=True):
+    """Evaluate many prompts, yielding `(key, feedback, error)` as each one completes.
+
+    `prompts` maps a caller-chosen key (e.g. the row number) to prompt text, so a
+    resumed run only needs the keys that have no result yet. Rate-limited calls are
+    retried with jittered exponential backoff, halving concurrency each time;
+    any other failure is reported through `error` and the batch carries on.
+    """
+    pending = dict(prompts)
+    response_cache = get_response_cache() if cache else None
+    model, temperature = model_settings(llm)
+    if response_cache:
+        for key, prompt in list(pending.items()):
+            hit = response_cache.get(model, temperature, coach_messages(prompt))
+            if hit is not None:
+                del pending[key]
+                yield key, hit, None
+
+    attempt = 0
+    while pending:
+        keys = list(pending)
+        inputs = [coach_messages(pending[key]) for key in keys]
+        throttled, last_error = {}, None
+        config = {"max_concurrency": max_concurrency}
+        for position, output in llm.batch_as_completed(inputs, config=config, return_exceptions=True):
+            key = keys[position]
+            if isinstance(output, Exception):
+                if is_rate_limited(output) and attempt < max_retries:
+                    throttled[key], last_error = pending[key], output
+                else:
+                    yield key, None, f"{type(output).__name__}: {output}"
+                continue
+            if response_cache:
+                response_cache.put(model, temperature, inputs[position], output.content)
+            yield key, output.content, None
+        pending = throttled
+        if pending:
+            attempt += 1
+            max_concurrency = max(1, max_concurrency // 2)
+            time.sleep(_backoff(attempt, last_error))
@@ -0,0 +1,27 @@
+"""Local text embeddings: hashed bag of words plus character trigrams.
+
+No model download and no network call, so they are cheap enough to compute on every
+request. They capture lexical rather than deep semantic similarity, which is what
+near-duplicate prompts and template search need.
+"""
+import hashlib
+import math
+import re
+from array import array
+
+EMBEDDING_DIM = 512
+
+_WORD = re.compile(r"\w+")
+
+
+def embed(text, dim=EMBEDDING_DIM):
+    """L2-normalized float32 vector for `text`."""
+    vector = [0.0] * dim
+    text = text.lower()
+    features = _WORD.findall(text)
+    features += [text[i:i + 3] for i in range(len(text) - 2)]
+    for feature in features:
+        h = int.from_bytes(hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest(), "little")
+        vector[h % dim] += 1.0 if (h >> 63) else -1.0
+    norm = math.sqrt(sum(v * v for v in vector)) or 1.0
+    return array("f", (v / norm for v in vector))
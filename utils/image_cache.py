@@ -0,0 +1,117 @@
+"""Content-addressed store for generated images.
+
+An image is keyed by a hash of the model id and every generation parameter, so
+resubmitting the same prompt, settings and seed is served from disk instead of
+minutes of diffusion. Each entry keeps the full PNG plus a small JPEG thumbnail;
+the gallery only ever reads thumbnails. Once the store grows past `max_bytes` the
+least recently used entries are deleted.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from io import BytesIO
+
+DEFAULT_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache", "images")
+DEFAULT_MAX_BYTES = 2 * 1024**3
+THUMBNAIL_SIZE = (256, 256)
+
+
+def image_key(model_id, params):
+    return hashlib.sha256(json.dumps({"model": model_id, **params}, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+class ImageCache:
+    def __init__(self, directory=DEFAULT_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        # Shared by the UI process and the worker processes, hence WAL.
+        self._conn = sqlite3.connect(os.path.join(directory, "index.sqlite"), check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS images (
+                key TEXT PRIMARY KEY,
+                params TEXT NOT NULL,
+                bytes INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )""")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_images_accessed ON images (accessed_at)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_images_created ON images (created_at)")
+        self._conn.commit()
+
+    def _path(self, key, suffix):
+        return os.path.join(self.directory, key[:2], f"{key}{suffix}")
+
+    def __contains__(self, key):
+        with self._lock:
+            return self._conn.execute("SELECT 1 FROM images WHERE key = ?", (key,)).fetchone() is not None
+
+    def get(self, key):
+        """Full-size PNG bytes, or None if the entry was never stored or has been evicted."""
+        try:
+            with open(self._path(key, ".png"), "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            return None
+        with self._lock:
+            self._conn.execute("UPDATE images SET accessed_at = ? WHERE key = ?", (time.time(), key))
+            self._conn.commit()
+        return data
+
+    def thumbnail(self, key):
+        try:
+            with open(self._path(key, ".thumb.jpg"), "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def put(self, key, params, image):
+        """Store a PIL image under `key` along with its thumbnail."""
+        png, thumb = BytesIO(), BytesIO()
+        image.save(png, format="PNG")
+        preview = image.copy()
+        preview.thumbnail(THUMBNAIL_SIZE)
+        preview.convert("RGB").save(thumb, format="JPEG", quality=85)
+        os.makedirs(os.path.dirname(self._path(key, "")), exist_ok=True)
+        # Write then rename, so readers never see a half-written file.
+        for suffix, data in ((".png", png.getvalue()), (".thumb.jpg", thumb.getvalue())):
+            path = self._path(key, suffix)
+            with open(path + ".tmp", "wb") as f:
+                f.write(data)
+            os.replace(path + ".tmp", path)
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO images (key, params, bytes, created_at, accessed_at) VALUES (?, ?, ?, ?, ?)",
+                (key, json.dumps(params), png.tell() + thumb.tell(), now, now),
+            )
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self):
+        total = self._conn.execute("SELECT COALESCE(SUM(bytes), 0) FROM images").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for key, size in self._conn.execute("SELECT key, bytes FROM images ORDER BY accessed_at").fetchall():
+            if total <= self.max_bytes:
+                break
+            for suffix in (".png", ".thumb.jpg"):
+                try:
+                    os.remove(self._path(key, suffix))
+                except FileNotFoundError:
+                    pass
+            self._conn.execute("DELETE FROM images WHERE key = ?", (key,))
+            total -= size
+
+    def recent(self, limit=12, offset=0):
+        """[(key, params), ...] newest first, for the gallery."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT key, params FROM images ORDER BY created_at DESC LIMIT ? OFFSET ?", (limit, offset)
+            ).fetchall()
+        return [(key, json.loads(params)) for key, params in rows]
@@ -0,0 +1,395 @@
+"""Background image generation.
+
+Diffusion on CPU takes minutes, far too long to hold a Streamlit script run. Jobs are
+queued to worker processes that each own a pipeline; the UI only submits jobs and
+polls their status. Workers report progress after every denoising step and check for
+cancellation at the same point. The number of worker processes caps how many jobs
+run at once, and the queue itself is bounded per session and overall. Finished
+images go to the content-addressed cache in utils.image_cache, and resubmitted
+parameters are answered from it without touching a worker.
+
+Preview jobs swap in DPM-Solver++ with a handful of steps at half resolution. Every
+job starts from noise drawn at full resolution from its seed (average-pooled down for
+previews), so a preview and its full-quality re-render share the same composition.
+
+A job may hold several images (variations of one prompt, or several prompts). They
+are denoised together in one batched pipeline call, and each distinct prompt is
+encoded once, with embeddings reused across variations and later jobs.
+"""
+import itertools
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from dataclasses import dataclass, field
+
+from utils.image_cache import DEFAULT_DIR, DEFAULT_MAX_BYTES, ImageCache, image_key
+from utils.llm import get_secret
+
+DEFAULT_MODEL_ID = "stabilityai/stable-diffusion-xl-base-1.0"
+FULL_SIZE = 1024
+PREVIEW_SIZE = 512
+PREVIEW_STEPS = 8
+MAX_SEED = 2**32 - 1
+# Prompt embeddings kept per worker, so re-rendering a preview skips the text encoders.
+MAX_CACHED_EMBEDDINGS = 32
+# Finished jobs kept in memory for polling before the oldest are dropped.
+MAX_FINISHED_JOBS = 200
+
+QUEUED, RUNNING, DONE, FAILED, CANCELLED = "queued", "running", "done", "failed", "cancelled"
+FINISHED = (DONE, FAILED, CANCELLED)
+
+
+class WorkerBusy(RuntimeError):
+    """Raised when a job would exceed the queue limits."""
+
+
+class _JobCancelled(Exception):
+    pass
+
+
+@dataclass
+class ImageJob:
+    id: int
+    owner: str
+    items: list  # one params dict per image (see generation_params)
+    keys: list  # image cache key per item
+    status: str = QUEUED
+    step: int = 0
+    total_steps: int = 0
+    cached: bool = False
+    error: str | None = None
+    submitted_at: float = field(default_factory=time.time)
+    started_at: float | None = None
+    finished_at: float | None = None
+
+    @property
+    def params(self):
+        """Settings shared by every image in the job (all items differ only in prompt and seed)."""
+        return self.items[0]
+
+    @property
+    def finished(self):
+        return self.status in FINISHED
+
+    @property
+    def progress(self):
+        return self.step / self.total_steps if self.total_steps else 0.0
+
+
+def generation_params(prompt, negative_prompt, guidance_scale, seed, preview=False, steps=50):
+    """Job parameters for a full-quality render, or a fast low-resolution preview."""
+    return {
+        "prompt": prompt,
+        "negative_prompt": negative_prompt,
+        "guidance_scale": guidance_scale,
+        "seed": int(seed),
+        "preview": preview,
+        "steps": PREVIEW_STEPS if preview else steps,
+        "size": PREVIEW_SIZE if preview else FULL_SIZE,
+    }
+
+
+def batch_params(prompts, negative_prompt, guidance_scale, seed, variations=1, preview=False, steps=50):
+    """Params for one batched job: `variations` seeds (seed, seed+1, ...) of each prompt.
+
+    Each item is exactly what a single-image job with that prompt and seed would use,
+    so batch results and single renders share cache entries.
+    """
+    return [
+        generation_params(prompt, negative_prompt, guidance_scale, (int(seed) + i) % (MAX_SEED + 1), preview=preview, steps=steps)
+        for prompt in prompts
+        for i in range(variations)
+    ]
+
+
+# --- Worker process ---
+def _peak_rss_mb():
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes.
+    return peak / 1024**2 if os.uname().sysname == "Darwin" else peak / 1024
+
+
+def _load_pipeline(model_id, options):
+    from diffusers import AutoPipelineForText2Image
+    # safetensors weights are memory-mapped, and low_cpu_mem_usage loads them straight into
+    # the model instead of into a randomly initialised copy first, so peak RSS stays near
+    # one copy of the weights.
+    pipe = AutoPipelineForText2Image.from_pretrained(
+        model_id, use_safetensors=True, low_cpu_mem_usage=options.get("low_cpu_mem_usage", True),
+    )
+    if options.get("attention_slicing"):
+        pipe.enable_attention_slicing()
+    if options.get("vae_tiling"):
+        pipe.enable_vae_tiling()
+    return pipe
+
+
+def _schedulers(pipe):
+    from diffusers import DPMSolverMultistepScheduler
+    preview = DPMSolverMultistepScheduler.from_config(pipe.scheduler.config, algorithm_type="dpmsolver++", use_karras_sigmas=True)
+    return {False: pipe.scheduler, True: preview}
+
+
+def _initial_latents(pipe, params):
+    import torch
+    import torch.nn.functional as F
+    scale = pipe.vae_scale_factor
+    generator = torch.Generator("cpu").manual_seed(params["seed"])
+    shape = (1, pipe.unet.config.in_channels, FULL_SIZE // scale, FULL_SIZE // scale)
+    latents = torch.randn(shape, generator=generator, dtype=pipe.unet.dtype)
+    factor = FULL_SIZE // params["size"]
+    if factor > 1:
+        # Average pooling shrinks the variance by factor**2; scale back to unit variance.
+        latents = F.avg_pool2d(latents, factor) * factor
+    return latents
+
+
+def _prompt_embeddings(pipe, items, cache):
+    """Batched prompt embeddings, encoding each distinct (prompt, negative prompt) once."""
+    import torch
+    encoded = []
+    for params in items:
+        key = (params["prompt"], params.get("negative_prompt") or "")
+        if key not in cache:
+            with torch.no_grad():
+                cache[key] = pipe.encode_prompt(
+                    params["prompt"], device=pipe.device, num_images_per_prompt=1,
+                    do_classifier_free_guidance=params["guidance_scale"] > 1.0,
+                    negative_prompt=params.get("negative_prompt") or None,
+                )
+            while len(cache) > MAX_CACHED_EMBEDDINGS:
+                cache.pop(next(iter(cache)))
+        encoded.append(cache[key])
+    # SDXL returns (embeds, negative, pooled, negative pooled); SD 1.x only the first two.
+    names = ["prompt_embeds", "negative_prompt_embeds", "pooled_prompt_embeds", "negative_pooled_prompt_embeds"]
+    return {
+        name: torch.cat([parts[i] for parts in encoded])
+        for i, name in enumerate(names[:len(encoded[0])])
+        if encoded[0][i] is not None
+    }
+
+
+def _drain(controls, cancelled):
+    while True:
+        try:
+            cancelled.add(controls.get_nowait())
+        except queue.Empty:
+            return
+
+
+def _worker_main(model_id, options, cache_dir, cache_max_bytes, jobs, events, controls):
+    cache = ImageCache(cache_dir, cache_max_bytes)
+    events.put(("worker", None, {"state": "loading"}))
+    start = time.perf_counter()
+    try:
+        pipe = _load_pipeline(model_id, options)
+    except Exception as e:
+        events.put(("worker", None, {"state": f"failed: {type(e).__name__}: {e}"}))
+        return
+    schedulers = _schedulers(pipe)
+    embeddings = {}
+    events.put(("worker", None, {"state": "ready", "load_seconds": time.perf_counter() - start, "peak_rss_mb": _peak_rss_mb()}))
+    cancelled = set()
+    while True:
+        item = jobs.get()
+        if item is None:
+            return
+        job_id, keys, items = item
+        params = items[0]
+        _drain(controls, cancelled)
+        if job_id in cancelled:
+            events.put(("cancelled", job_id, None))
+            continue
+        events.put(("started", job_id, None))
+
+        def on_step_end(pipeline, step, timestep, callback_kwargs):
+            _drain(controls, cancelled)
+            if job_id in cancelled:
+                raise _JobCancelled()
+            events.put(("progress", job_id, step + 1))
+            return callback_kwargs
+
+        try:
+            import torch
+            pipe.scheduler = schedulers[params["preview"]]
+            # One pipeline call for the whole batch; per-item latents keep every image
+            # identical to what a single render with its seed would produce.
+            images = pipe(
+                num_inference_steps=params["steps"],
+                guidance_scale=params["guidance_scale"],
+                width=params["size"],
+                height=params["size"],
+                latents=torch.cat([_initial_latents(pipe, item) for item in items]),
+                callback_on_step_end=on_step_end,
+                **_prompt_embeddings(pipe, items, embeddings),
+            ).images
+            for key, item, image in zip(keys, items, images):
+                cache.put(key, item, image)
+            events.put(("done", job_id, None))
+        except _JobCancelled:
+            events.put(("cancelled", job_id, None))
+        except Exception as e:
+            events.put(("failed", job_id, f"{type(e).__name__}: {e}"))
+
+
+# --- UI-side handle ---
+class ImageWorker:
+    def __init__(self, model_id=DEFAULT_MODEL_ID, workers=1, max_queued=8, max_per_owner=2,
+                 cache_dir=DEFAULT_DIR, cache_max_bytes=DEFAULT_MAX_BYTES, load_options=None, max_batch=4):
+        self.model_id = model_id
+        self.max_batch = max_batch
+        self.load_stats = {}  # load_seconds and peak_rss_mb of the most recently loaded worker
+        self.cache = ImageCache(cache_dir, cache_max_bytes)
+        self.max_queued = max_queued
+        self.max_per_owner = max_per_owner
+        self.state = "starting"
+        self._jobs = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        # Spawn rather than fork: the Streamlit server process is full of threads.
+        context = multiprocessing.get_context("spawn")
+        self._job_queue = context.Queue()
+        self._events = context.Queue()
+        # One control queue per worker: cancellations are broadcast, since any worker may
+        # be running (or later pick up) the job, and a message read by another is lost.
+        self._controls = [context.Queue() for _ in range(workers)]
+        self._processes = [
+            context.Process(
+                target=_worker_main,
+                args=(model_id, load_options or {}, cache_dir, cache_max_bytes, self._job_queue, self._events, controls),
+                daemon=True, name=f"image-worker-{i}",
+            )
+            for i, controls in enumerate(self._controls)
+        ]
+        for process in self._processes:
+            process.start()
+        threading.Thread(target=self._listen, daemon=True, name="image-worker-events").start()
+
+    def _listen(self):
+        while True:
+            kind, job_id, payload = self._events.get()
+            with self._lock:
+                if kind == "worker":
+                    self.state = payload.pop("state")
+                    self.load_stats.update(payload)
+                    continue
+                job = self._jobs.get(job_id)
+                if job is None:
+                    continue
+                if kind == "started":
+                    job.status, job.started_at = RUNNING, time.time()
+                elif kind == "progress":
+                    job.step = payload
+                elif kind == "done":
+                    job.status, job.step = DONE, job.total_steps
+                elif kind == "failed":
+                    job.status, job.error = FAILED, payload
+                elif kind == "cancelled":
+                    job.status = CANCELLED
+                if job.finished:
+                    job.finished_at = time.time()
+                    self._trim()
+
+    def _trim(self):
+        finished = [job for job in self._jobs.values() if job.finished]
+        for job in sorted(finished, key=lambda job: job.finished_at)[:-MAX_FINISHED_JOBS or None]:
+            del self._jobs[job.id]
+
+    def submit(self, owner, items):
+        """Queue a job for `items` (see batch_params) and return its id immediately.
+
+        Raises WorkerBusy if the queue is full or the batch is too large. Images that were
+        generated before (same model, prompt, settings and seed) come straight from the
+        image cache; if every item is cached the job is finished on arrival.
+        """
+        if isinstance(items, dict):
+            items = [items]
+        if len(items) > self.max_batch:
+            raise WorkerBusy(f"A batch can have at most {self.max_batch} images.")
+        keys = [image_key(self.model_id, item) for item in items]
+        missing = [i for i, key in enumerate(keys) if key not in self.cache]
+        steps = items[0]["steps"]
+        if not missing:
+            now = time.time()
+            job = ImageJob(next(self._ids), owner, list(items), keys, status=DONE, cached=True,
+                           step=steps, total_steps=steps, started_at=now, finished_at=now)
+            with self._lock:
+                self._jobs[job.id] = job
+                self._trim()
+            return job.id
+        with self._lock:
+            active = [job for job in self._jobs.values() if not job.finished]
+            if len(active) >= self.max_queued:
+                raise WorkerBusy("The image queue is full. Please try again in a moment.")
+            if sum(1 for job in active if job.owner == owner) >= self.max_per_owner:
+                raise WorkerBusy(f"You can have at most {self.max_per_owner} images in progress.")
+            job = ImageJob(next(self._ids), owner, list(items), keys, total_steps=steps)
+            self._jobs[job.id] = job
+        # Only the images not already cached are generated.
+        self._job_queue.put((job.id, [keys[i] for i in missing], [items[i] for i in missing]))
+        return job.id
+
+    def cancel(self, job_id):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job.finished:
+                return
+            if job.status == QUEUED:
+                job.status, job.finished_at = CANCELLED, time.time()
+        # Workers check this before starting a job and after every denoising step.
+        for controls in self._controls:
+            controls.put(job_id)
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def jobs_for(self, owner):
+        with self._lock:
+            return [job for job in self._jobs.values() if job.owner == owner]
+
+    def queue_position(self, job_id):
+        with self._lock:
+            queued = sorted(job.id for job in self._jobs.values() if job.status == QUEUED)
+        return queued.index(job_id) + 1 if job_id in queued else 0
+
+
+_worker = None
+_worker_lock = threading.Lock()
+
+
+def _flag(name, default):
+    return str(get_secret(name, default)).lower() in ("1", "true", "yes", "on")
+
+
+def get_image_worker():
+    """Process-wide worker pool, configured from IMAGE_MODEL_ID / IMAGE_WORKERS / IMAGE_MAX_QUEUED.
+
+    Creating it starts the worker processes, which begin loading the model right away
+    without blocking the caller; Home.py does this so the model warms up at startup.
+    """
+    global _worker
+    if _worker is None:
+        with _worker_lock:
+            if _worker is None:
+                _worker = ImageWorker(
+                    model_id=get_secret("IMAGE_MODEL_ID", DEFAULT_MODEL_ID),
+                    workers=int(get_secret("IMAGE_WORKERS", 1)),
+                    max_queued=int(get_secret("IMAGE_MAX_QUEUED", 8)),
+                    max_per_owner=int(get_secret("IMAGE_MAX_JOBS_PER_SESSION", 2)),
+                    cache_dir=get_secret("IMAGE_CACHE_DIR", DEFAULT_DIR),
+                    cache_max_bytes=int(get_secret("IMAGE_CACHE_MAX_BYTES", DEFAULT_MAX_BYTES)),
+                    max_batch=int(get_secret("IMAGE_MAX_BATCH", 4)),
+                    load_options={
+                        "low_cpu_mem_usage": _flag("IMAGE_LOW_CPU_MEM_USAGE", True),
+                        "attention_slicing": _flag("IMAGE_ATTENTION_SLICING", False),
+                        "vae_tiling": _flag("IMAGE_VAE_TILING", False),
+                    },
+                )
+    return _worker
@@ -0,0 +1,137 @@
+"""Shared, persistent leaderboard.
+
+Scores live in SQLite (WAL mode) so every session and server process sees the same
+board. A submission is a single-row upsert on the primary key and the board is read
+through an index on points, so neither grows with the number of players beyond the
+B-tree lookups: top-K reads K index entries. A player's rank comes from score_counts
+(players per distinct score, kept in step with every upsert), so it sums one row per
+distinct higher score instead of counting every player above them.
+"""
+import os
+import sqlite3
+import threading
+import time
+
+from utils.llm import get_secret
+
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "leaderboard.sqlite")
+
+DEFAULT_PLAYERS = [
+    ("seed-1", "AI Enthusiast 1", 150),
+    ("seed-2", "Prompt Master", 220),
+    ("seed-3", "Code Whisperer", 180),
+]
+
+
+class Leaderboard:
+    def __init__(self, path=DEFAULT_PATH):
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30, isolation_level=None)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS scores (
+                    user_id TEXT PRIMARY KEY,
+                    name TEXT NOT NULL,
+                    points INTEGER NOT NULL DEFAULT 0,
+                    updated_at REAL NOT NULL
+                )""")
+            # Ties go to whoever reached the score first.
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_scores_points ON scores (points DESC, updated_at)")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS score_counts (
+                    points INTEGER PRIMARY KEY,
+                    players INTEGER NOT NULL
+                )""")
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                if self._conn.execute("SELECT COUNT(*) FROM scores").fetchone()[0] == 0:
+                    now = time.time()
+                    self._conn.executemany(
+                        "INSERT OR IGNORE INTO scores (user_id, name, points, updated_at) VALUES (?, ?, ?, ?)",
+                        [(user_id, name, points, now) for user_id, name, points in DEFAULT_PLAYERS],
+                    )
+                # Boards created before score_counts existed are counted once here.
+                if self._conn.execute("SELECT COUNT(*) FROM score_counts").fetchone()[0] == 0:
+                    self._conn.execute("INSERT INTO score_counts SELECT points, COUNT(*) FROM scores GROUP BY points")
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def _query(self, sql, params=()):
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    def add_points(self, user_id, name, points):
+        """Add `points` to a player (creating them if needed) and return their new total."""
+        with self._lock:
+            # BEGIN IMMEDIATE takes the write lock up front, so concurrent processes
+            # queue on busy_timeout instead of failing on lock upgrade.
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute("SELECT points FROM scores WHERE user_id = ?", (user_id,)).fetchone()
+                self._conn.execute(
+                    """INSERT INTO scores (user_id, name, points, updated_at) VALUES (?, ?, ?, ?)
+                       ON CONFLICT (user_id) DO UPDATE SET
+                           name = excluded.name,
+                           points = points + excluded.points,
+                           updated_at = excluded.updated_at""",
+                    (user_id, name, int(points), time.time()),
+                )
+                total = self._conn.execute("SELECT points FROM scores WHERE user_id = ?", (user_id,)).fetchone()[0]
+                if row is not None:
+                    self._conn.execute("UPDATE score_counts SET players = players - 1 WHERE points = ?", (row[0],))
+                    self._conn.execute("DELETE FROM score_counts WHERE points = ? AND players <= 0", (row[0],))
+                self._conn.execute(
+                    "INSERT INTO score_counts (points, players) VALUES (?, 1) "
+                    "ON CONFLICT (points) DO UPDATE SET players = players + 1",
+                    (total,),
+                )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return total
+
+    def rename(self, user_id, name):
+        with self._lock:
+            self._conn.execute("UPDATE scores SET name = ? WHERE user_id = ?", (name, user_id))
+
+    def top(self, limit=10):
+        """[(rank, name, points), ...] for the best `limit` players; tied players share a rank."""
+        rows = self._query("SELECT name, points FROM scores ORDER BY points DESC, updated_at LIMIT ?", (limit,))
+        board = []
+        for position, (name, points) in enumerate(rows, start=1):
+            rank = board[-1][0] if board and board[-1][2] == points else position
+            board.append((rank, name, points))
+        return board
+
+    def rank(self, user_id):
+        """(rank, points) for a player, or None if they haven't scored yet."""
+        row = self._query("SELECT points FROM scores WHERE user_id = ?", (user_id,))
+        if not row:
+            return None
+        points = row[0][0]
+        above = self._query("SELECT COALESCE(SUM(players), 0) FROM score_counts WHERE points > ?", (points,))[0][0]
+        return above + 1, points
+
+    def count(self):
+        return self._query("SELECT COUNT(*) FROM scores")[0][0]
+
+
+_leaderboard = None
+_leaderboard_lock = threading.Lock()
+
+
+def get_leaderboard():
+    """Return the process-wide leaderboard, stored at LEADERBOARD_DB_PATH."""
+    global _leaderboard
+    if _leaderboard is None:
+        with _leaderboard_lock:
+            if _leaderboard is None:
+                _leaderboard = Leaderboard(get_secret("LEADERBOARD_DB_PATH", DEFAULT_PATH))
+    return _leaderboard
@@ -0,0 +1,253 @@
+"""Process-wide registry of chat model clients.
+
+Streamlit re-executes a page on every interaction, so clients built at page level
+are rebuilt (with a cold connection pool) on each rerun. `get_llm` hands out one
+client per (provider, model, temperature) for the whole server process instead,
+and every OpenAI client shares a single keep-alive HTTP pool.
+
+Each client waits for the shared request scheduler (utils.scheduler) before every
+request, retries rate limits and timeouts with jittered exponential backoff (for
+streams too, as long as no chunk has been delivered yet), and falls back to a lighter model (FALLBACK_MODELS, or LLM_FALLBACKS) when its own model
+keeps failing or can't be admitted in time.
+
+Provider "mock" (or LLM_PROVIDER=mock, which routes every request to it) builds the
+offline utils.mock_llm.MockChatModel, for development and benchmarks.
+
+Provider SDKs (and httpx) are imported when the first client is built, not when a
+page imports this module, so pages render before any model code is loaded.
+"""
+import asyncio
+import os
+import random
+import threading
+import time
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+API_KEY_NAMES = {
+    "openai": "OPENAI_API_KEY",
+    "google": "GOOGLE_API_KEY",
+    "anthropic": "ANTHROPIC_API_KEY",
+}
+
+# Connection pool shared by every OpenAI client in the process.
+HTTP_LIMITS = {"max_connections": 100, "max_keepalive_connections": 20, "keepalive_expiry": 60}
+HTTP_TIMEOUT = {"timeout": 120.0, "connect": 10.0}
+
+# Default fallback for each model. LLM_FALLBACKS adds or overrides entries, as
+# comma-separated "model=provider:model" pairs (e.g. "gpt-4o=anthropic:claude-3-5-sonnet-latest").
+FALLBACK_MODELS = {
+    "gpt-4o": ("openai", "gpt-4o-mini"),
+    "gemini-1.5-pro-latest": ("google", "gemini-1.5-flash-latest"),
+    "claude-3-sonnet-20240229": ("anthropic", "claude-3-haiku-20240307"),
+}
+MAX_ATTEMPTS = 3
+MAX_BACKOFF = 60.0
+
+_clients = {}
+# Reentrant: building a client also builds (and registers) its fallback.
+_lock = threading.RLock()
+_http_client = None
+_retry_class = None
+
+
+def get_secret(name, default=None):
+    """Read a setting from Streamlit secrets, falling back to the environment (and .env)."""
+    try:
+        import streamlit as st
+        if name in st.secrets:
+            return st.secrets[name]
+    except Exception:
+        # No secrets.toml, or running outside Streamlit.
+        pass
+    return os.environ.get(name, default)
+
+
+def is_configured(provider):
+    """Whether `provider` has an API key (or runs on the mock), checked without importing its SDK."""
+    if provider == "mock" or get_secret("LLM_PROVIDER") == "mock":
+        return True
+    return provider in API_KEY_NAMES and bool(get_secret(API_KEY_NAMES[provider]))
+
+
+def _shared_http_client():
+    global _http_client
+    if _http_client is None:
+        import httpx
+        _http_client = httpx.Client(limits=httpx.Limits(**HTTP_LIMITS), timeout=httpx.Timeout(**HTTP_TIMEOUT))
+    return _http_client
+
+
+def _api_key(provider):
+    key = get_secret(API_KEY_NAMES[provider])
+    if not key:
+        raise KeyError(f"{API_KEY_NAMES[provider]} is not configured.")
+    return key
+
+
+def _callbacks():
+    if str(get_secret("TELEMETRY", "1")).lower() in ("0", "false", "no", "off"):
+        return []
+    from utils.telemetry import get_telemetry_handler
+    return [get_telemetry_handler()]
+
+
+def _build(provider, model, temperature):
+    """The bare chat model, plus the exception types worth retrying for its provider."""
+    from utils.scheduler import client_hooks
+    rate_limiter, scheduler_handler = client_hooks(provider, model)
+    kwargs = {} if temperature is None else {"temperature": temperature}
+    # Every client reports latency, tokens and errors to utils.telemetry, and usage and
+    # rate limits to the scheduler. Retries happen in get_llm, where every session
+    # shares the scheduler's backoff, so the SDKs' own retries are turned off.
+    kwargs.update(callbacks=_callbacks() + [scheduler_handler], rate_limiter=rate_limiter, max_retries=0)
+    if provider == "openai":
+        import openai
+        from langchain_openai import ChatOpenAI
+        client = ChatOpenAI(
+            api_key=_api_key(provider), model_name=model, http_client=_shared_http_client(),
+            stream_usage=True, **kwargs,
+        )
+        return client, (openai.RateLimitError, openai.APITimeoutError, openai.InternalServerError)
+    if provider == "google":
+        from google.api_core import exceptions
+        from langchain_google_genai import ChatGoogleGenerativeAI
+        client = ChatGoogleGenerativeAI(api_key=_api_key(provider), model=model, **kwargs)
+        return client, (exceptions.ResourceExhausted, exceptions.DeadlineExceeded, exceptions.ServiceUnavailable)
+    if provider == "anthropic":
+        import anthropic
+        from langchain_anthropic import ChatAnthropic
+        client = ChatAnthropic(api_key=_api_key(provider), model_name=model, **kwargs)
+        return client, (anthropic.RateLimitError, anthropic.APITimeoutError, anthropic.InternalServerError)
+    if provider == "mock":
+        from utils.mock_llm import MockChatModel, MockRateLimitError, MockTimeoutError
+        del kwargs["max_retries"]
+        client = MockChatModel(
+            model_name=f"mock-{model}",
+            latency=float(get_secret("MOCK_LLM_LATENCY", 0.2)),
+            tokens_per_second=float(get_secret("MOCK_LLM_TOKENS_PER_SECOND", 200)),
+            response_tokens=int(get_secret("MOCK_LLM_RESPONSE_TOKENS", 60)),
+            error_rate=float(get_secret("MOCK_LLM_ERROR_RATE", 0.0)),
+            seed=int(get_secret("MOCK_LLM_SEED", 0)),
+            **kwargs,
+        )
+        return client, (MockRateLimitError, MockTimeoutError)
+    raise ValueError(f"Unknown LLM provider: {provider}")
+
+
+def _fallback_for(model):
+    fallbacks = dict(FALLBACK_MODELS)
+    for pair in filter(None, (get_secret("LLM_FALLBACKS", "") or "").split(",")):
+        name, _, target = pair.partition("=")
+        provider, _, fallback_model = target.partition(":")
+        fallbacks[name.strip()] = (provider.strip(), fallback_model.strip())
+    return fallbacks.get(model)
+
+
+def get_llm(provider, model, temperature=None, fallback=True):
+    """Return the shared client for (provider, model, temperature), building it on first use.
+
+    Clients are stateless between calls, so one instance is safely shared across
+    sessions and threads. With `fallback`, requests that still fail after retries (or
+    time out waiting for the scheduler) are sent to the model's fallback instead,
+    if that provider is configured.
+    """
+    if get_secret("LLM_PROVIDER") == "mock":
+        provider = "mock"
+    key = (provider, model, temperature, fallback)
+    client = _clients.get(key)
+    if client is None:
+        with _lock:
+            client = _clients.get(key)
+            if client is None:
+                client = _clients[key] = _resilient(provider, model, temperature, fallback)
+    return client
+
+
+def _stream_backoff(attempt, exc):
+    # A rate-limited model is already held back by the scheduler's cooldown, which the
+    # next attempt waits for; other errors back off here.
+    if is_rate_limited(exc):
+        return 0.0
+    return random.uniform(0, min(MAX_BACKOFF, 2 ** attempt))
+
+
+class _StreamRetry:
+    """RunnableRetry only retries invoke and batch; this also retries `stream`/`astream`.
+
+    A stream is re-opened only while it has not produced a chunk, so callers never
+    see output twice. Combined with RunnableRetry in `_retrying`.
+    """
+
+    def stream(self, input, config=None, **kwargs):
+        attempt = 1
+        while True:
+            started = False
+            try:
+                for chunk in self.bound.stream(input, self._merge_configs(config), **{**self.kwargs, **kwargs}):
+                    started = True
+                    yield chunk
+                return
+            except self.retry_exception_types as exc:
+                if started or attempt >= self.max_attempt_number:
+                    raise
+                time.sleep(_stream_backoff(attempt, exc))
+                attempt += 1
+
+    async def astream(self, input, config=None, **kwargs):
+        attempt = 1
+        while True:
+            started = False
+            try:
+                async for chunk in self.bound.astream(input, self._merge_configs(config), **{**self.kwargs, **kwargs}):
+                    started = True
+                    yield chunk
+                return
+            except self.retry_exception_types as exc:
+                if started or attempt >= self.max_attempt_number:
+                    raise
+                await asyncio.sleep(_stream_backoff(attempt, exc))
+                attempt += 1
+
+
+def _retrying(client, retryable):
+    global _retry_class
+    if _retry_class is None:
+        from langchain_core.runnables.retry import RunnableRetry
+        _retry_class = type("StreamingRunnableRetry", (_StreamRetry, RunnableRetry), {})
+    return _retry_class(
+        bound=client, kwargs={}, config={}, retry_exception_types=retryable,
+        wait_exponential_jitter=True, max_attempt_number=MAX_ATTEMPTS,
+    )
+
+
+def _resilient(provider, model, temperature, fallback):
+    client, retryable = _build(provider, model, temperature)
+    runnable = _retrying(client, retryable)
+    target = _fallback_for(model) if fallback else None
+    if target:
+        try:
+            backup = get_llm(target[0], target[1], temperature, fallback=False)
+        except Exception:
+            # The fallback's provider isn't configured; run without one.
+            return runnable
+        return runnable.with_fallbacks([backup])
+    return runnable
+
+
+def is_rate_limited(exc):
+    """True for provider 429s / quota errors, which are worth retrying after a pause."""
+    status = getattr(exc, "status_code", None) or getattr(getattr(exc, "response", None), "status_code", None)
+    name = type(exc).__name__
+    return status == 429 or "RateLimit" in name or "ResourceExhausted" in name
+
+
+def retry_after(exc):
+    """Seconds the provider asked us to wait, if it sent a Retry-After header."""
+    headers = getattr(getattr(exc, "response", None), "headers", None) or {}
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
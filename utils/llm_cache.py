@@ -0,0 +1,193 @@
+"""Persistent response cache for LLM calls.
+
+Entries live in SQLite and are keyed on (model, temperature, normalized messages).
+Old entries expire after a TTL and the least recently used ones are evicted once the
+cache grows past `max_entries`. With `semantic=True` a miss falls back to a
+near-duplicate lookup: the last user message is embedded locally (see
+utils.embeddings) and compared against earlier entries that
+share the same model, temperature and preceding messages. The embeddings are lexical,
+so a near-duplicate can differ in meaning (an added "not", a swapped name); only use
+it where such a neighbour's answer is still acceptable, not for grades or analyses.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from array import array
+
+from utils.embeddings import embed
+from utils.llm import get_secret
+
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache", "llm_responses.sqlite")
+DEFAULT_TTL = 7 * 24 * 3600
+DEFAULT_MAX_ENTRIES = 5000
+SEMANTIC_THRESHOLD = 0.92
+# Upper bound on rows compared during a near-duplicate lookup.
+SEMANTIC_CANDIDATES = 2000
+
+_ROLES = {"human": "user", "ai": "assistant"}
+
+
+def _normalize_text(text):
+    return " ".join(str(text).split())
+
+
+def normalize_messages(messages):
+    """Turn a str, dict/tuple list or LangChain message list into [(role, text), ...]."""
+    if isinstance(messages, str):
+        return [("user", _normalize_text(messages))]
+    normalized = []
+    for message in messages:
+        if isinstance(message, dict):
+            role, content = message.get("role", "user"), message.get("content", "")
+        elif isinstance(message, (tuple, list)):
+            role, content = message
+        else:
+            role, content = message.type, message.content
+        normalized.append((_ROLES.get(role, role), _normalize_text(content)))
+    return normalized
+
+
+def _digest(payload):
+    return hashlib.sha256(json.dumps(payload, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    def __init__(self, path=DEFAULT_PATH, ttl=DEFAULT_TTL, max_entries=DEFAULT_MAX_ENTRIES):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+        self._puts = 0
+        self._lock = threading.Lock()
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                context_key TEXT NOT NULL,
+                response TEXT NOT NULL,
+                embedding BLOB,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )""")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_accessed ON responses (accessed_at)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_context ON responses (context_key, accessed_at)")
+        self._conn.commit()
+
+    @staticmethod
+    def _keys(model, temperature, messages):
+        normalized = normalize_messages(messages)
+        key = _digest([model, temperature, normalized])
+        # Everything except the final message: near-duplicates must share model, settings and system prompt.
+        context_key = _digest([model, temperature, normalized[:-1]])
+        return key, context_key, normalized[-1][1] if normalized else ""
+
+    def get(self, model, temperature, messages, semantic=False, threshold=SEMANTIC_THRESHOLD):
+        key, context_key, last_text = self._keys(model, temperature, messages)
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT key, response FROM responses WHERE key = ? AND created_at > ?", (key, now - self.ttl)
+            ).fetchone()
+            if row is None and semantic:
+                row = self._nearest(context_key, embed(last_text), threshold, now)
+                if row is not None:
+                    self.semantic_hits += 1
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, row[0]))
+            self._conn.commit()
+            return row[1]
+
+    def _nearest(self, context_key, query, threshold, now):
+        best, best_score = None, threshold
+        rows = self._conn.execute(
+            "SELECT key, response, embedding FROM responses WHERE context_key = ? AND created_at > ? "
+            "ORDER BY accessed_at DESC LIMIT ?",
+            (context_key, now - self.ttl, SEMANTIC_CANDIDATES),
+        )
+        for key, response, blob in rows:
+            if blob is None:
+                continue
+            vector = array("f")
+            vector.frombytes(blob)
+            score = sum(a * b for a, b in zip(query, vector))
+            if score >= best_score:
+                best, best_score = (key, response), score
+        return best
+
+    def put(self, model, temperature, messages, response):
+        key, context_key, last_text = self._keys(model, temperature, messages)
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, context_key, response, embedding, created_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, context_key, response, embed(last_text).tobytes(), now, now),
+            )
+            self._puts += 1
+            # Eviction scans the table, so only do it every so often.
+            if self._puts % 50 == 1:
+                self._evict(now)
+            self._conn.commit()
+
+    def _evict(self, now):
+        self._conn.execute("DELETE FROM responses WHERE created_at <= ?", (now - self.ttl,))
+        self._conn.execute(
+            "DELETE FROM responses WHERE key IN ("
+            "SELECT key FROM responses ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,),
+        )
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+            self._conn.commit()
+
+    def stats(self):
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        lookups = self.hits + self.misses
+        return {
+            "entries": entries,
+            "hits": self.hits,
+            "semantic_hits": self.semantic_hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_response_cache():
+    """Return the process-wide cache, configured from LLM_CACHE_PATH / LLM_CACHE_TTL / LLM_CACHE_MAX_ENTRIES."""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = ResponseCache(
+                    path=get_secret("LLM_CACHE_PATH", DEFAULT_PATH),
+                    ttl=float(get_secret("LLM_CACHE_TTL", DEFAULT_TTL)),
+                    max_entries=int(get_secret("LLM_CACHE_MAX_ENTRIES", DEFAULT_MAX_ENTRIES)),
+                )
+    return _cache
+
+
+def model_settings(llm):
+    """(model name, temperature) of a chat model, used as the model half of the cache key."""
+    # Unwrap retry/fallback wrappers (see utils.llm.get_llm) down to the primary model.
+    while getattr(llm, "runnable", None) is not None or getattr(llm, "bound", None) is not None:
+        llm = getattr(llm, "runnable", None) or llm.bound
+    model = getattr(llm, "model_name", None) or getattr(llm, "model", None) or type(llm).__name__
+    return model, getattr(llm, "temperature", None)
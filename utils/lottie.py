@@ -0,0 +1,105 @@
+"""Lottie animations for page headers.
+
+Animations are read from assets/lottie/ (scripts/fetch_lottie.py downloads them all
+from lottie.host). Rendering never waits on the network: until an animation is on disk
+the page shows the small bundled placeholder, while a background thread fetches it
+(LOTTIE_FETCH_TIMEOUT seconds, 0 to disable) and saves it there for later processes.
+A failed fetch is retried after RETRY_AFTER seconds. Each animation is parsed once per
+process and shared by every page and session.
+"""
+import json
+import threading
+import time
+from pathlib import Path
+
+from utils.llm import get_secret
+
+ASSET_DIR = Path(__file__).resolve().parent.parent / "assets" / "lottie"
+FALLBACK = "fallback"
+FETCH_TIMEOUT = 10.0
+RETRY_AFTER = 300.0
+
+_animations = {}
+_fetches = {}  # name -> monotonic time of the last fetch attempt
+_lock = threading.Lock()
+
+# Source of each animation.
+ANIMATIONS = {
+    "home": "https://lottie.host/e589f6d0-e923-43a0-8320-22c293339d37/jV59mET35j.json",
+    "playground": "https://lottie.host/b246995b-59e3-441a-85e8-4012581643c3/g6a5h2BAbp.json",
+    "coach": "https://lottie.host/5788d57d-f4d0-466d-88b5-3037f69427b2/pS92yJe36u.json",
+    "builder": "https://lottie.host/17a8b0c8-2b89-4886-8889-2cc35141b714/g3d2FJy6jG.json",
+    "library": "https://lottie.host/80a316b6-1175-4c07-8809-b1d9774619d8/rO9k060XAa.json",
+    "image_lab": "https://lottie.host/4e50481b-922a-45c0-b53c-1346999091e3/ZcZk0l977n.json",
+    "gamification": "https://lottie.host/532c5c81-ff2b-4607-9144-096455c0714f/Q01j7JGYNq.json",
+    "collaboration": "https://lottie.host/69059723-a89c-4d99-b99c-785889c3e09c/l4VpXFohs8.json",
+    "career": "https://lottie.host/8e1856d7-f140-450d-a637-71798119d399/o6VlqU6mF6.json",
+    "ethics": "https://lottie.host/1b5a5516-1c4a-4b84-b1e8-3145643ff028/oU0Gj2EnKn.json",
+}
+
+
+def asset_path(name):
+    return ASSET_DIR / f"{name}.json"
+
+
+def _read(name):
+    try:
+        return json.loads(asset_path(name).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+
+
+def _fetch(name, timeout):
+    """Download animation `name`, save it under ASSET_DIR and make it current for this process."""
+    import requests
+    try:
+        response = requests.get(ANIMATIONS[name], timeout=timeout)
+        response.raise_for_status()
+        animation = response.json()
+    except (requests.RequestException, ValueError):
+        return
+    _animations[name] = animation
+    try:
+        ASSET_DIR.mkdir(parents=True, exist_ok=True)
+        asset_path(name).write_text(json.dumps(animation), encoding="utf-8")
+    except OSError:
+        # Read-only checkout: use it for this process only.
+        pass
+
+
+def _fetch_in_background(name):
+    timeout = float(get_secret("LOTTIE_FETCH_TIMEOUT", FETCH_TIMEOUT))
+    if name not in ANIMATIONS or timeout <= 0:
+        return
+    with _lock:
+        last = _fetches.get(name)
+        if last is not None and time.monotonic() - last < RETRY_AFTER:
+            return
+        _fetches[name] = time.monotonic()
+    threading.Thread(target=_fetch, args=(name, timeout), name=f"lottie-{name}", daemon=True).start()
+
+
+def load_animation(name):
+    """The parsed animation `name`, or the bundled fallback while it is being fetched."""
+    animation = _animations.get(name)
+    if animation is None:
+        animation = _read(name)
+        if animation is None:
+            _fetch_in_background(name)
+            return _animations.get(name) or _fallback()
+        _animations[name] = animation
+    return animation
+
+
+def _fallback():
+    animation = _animations.get(FALLBACK)
+    if animation is None:
+        animation = _animations[FALLBACK] = _read(FALLBACK)
+    return animation
+
+
+def show_animation(name, height, key):
+    animation = load_animation(name)
+    if animation:
+        from streamlit_lottie import st_lottie
+        st_lottie(animation, speed=1, height=height, key=key)
@@ -0,0 +1,107 @@
+"""Deterministic offline stand-in for the provider chat models.
+
+`MockChatModel` is a real LangChain chat model, so it runs through the same path
+as the provider clients (streaming, batching, callbacks, the request scheduler).
+Each call waits `latency` seconds before the first token, then streams
+`response_tokens` tokens at `tokens_per_second`. With probability `error_rate` it
+raises a 429-style `MockRateLimitError` or a `MockTimeoutError` instead. Replies are
+built from a hash of the input and the call's seed, so runs are reproducible.
+
+get_llm builds it for provider "mock", and for every provider when LLM_PROVIDER=mock.
+Its behaviour is configured with MOCK_LLM_LATENCY, MOCK_LLM_TOKENS_PER_SECOND,
+MOCK_LLM_RESPONSE_TOKENS, MOCK_LLM_ERROR_RATE and MOCK_LLM_SEED.
+"""
+import hashlib
+import random
+import threading
+import time
+
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from pydantic import PrivateAttr
+
+WORDS = (
+    "prompt clarity context model output example constraint format audience tone detail "
+    "step goal role instruction response quality improve specific concise structure"
+).split()
+
+
+class MockRateLimitError(Exception):
+    status_code = 429
+
+
+class MockTimeoutError(TimeoutError):
+    pass
+
+
+class MockChatModel(BaseChatModel):
+    model_name: str = "mock"
+    temperature: float | None = None
+    latency: float = 0.2
+    tokens_per_second: float = 200.0
+    response_tokens: int = 60
+    error_rate: float = 0.0
+    seed: int = 0
+    _rng: random.Random = PrivateAttr()
+    _rng_lock: threading.Lock = PrivateAttr(default_factory=threading.Lock)
+
+    def model_post_init(self, __context):
+        self._rng = random.Random(self.seed)
+
+    @property
+    def _llm_type(self):
+        return "mock"
+
+    @property
+    def _identifying_params(self):
+        return {"model_name": self.model_name, "latency": self.latency, "tokens_per_second": self.tokens_per_second}
+
+    def _get_ls_params(self, stop=None, **kwargs):
+        params = super()._get_ls_params(stop=stop, **kwargs)
+        params.update(ls_provider="mock", ls_model_name=self.model_name)
+        return params
+
+    def _roll(self):
+        with self._rng_lock:
+            return self._rng.random()
+
+    def _reply(self, messages):
+        text = "\n".join(str(message.content) for message in messages)
+        digest = hashlib.sha256(f"{self.seed}:{self.model_name}:{text}".encode("utf-8")).digest()
+        words = [WORDS[byte % len(WORDS)] for byte in (digest * (self.response_tokens // len(digest) + 1))[:self.response_tokens]]
+        tokens = [f"{word} " for word in words]
+        # Prompts that ask for a score (the Prompt Coach) get one, so graders can parse it.
+        if "Overall Score" in text:
+            tokens.append(f"\nOverall Score: {digest[0] % 10 + 1}/10")
+        input_tokens = max(1, len(text.split()) * 4 // 3)
+        return tokens, {"input_tokens": input_tokens, "output_tokens": len(tokens), "total_tokens": input_tokens + len(tokens)}
+
+    def _maybe_fail(self):
+        if self.error_rate and self._roll() < self.error_rate:
+            if self._roll() < 0.5:
+                raise MockRateLimitError("Mock rate limit exceeded.")
+            raise MockTimeoutError("Mock request timed out.")
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        tokens, usage = self._reply(messages)
+        time.sleep(self.latency)
+        self._maybe_fail()
+        time.sleep(len(tokens) / self.tokens_per_second)
+        message = AIMessage(content="".join(tokens), usage_metadata=usage)
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs):
+        tokens, usage = self._reply(messages)
+        time.sleep(self.latency)
+        self._maybe_fail()
+        delay = 1.0 / self.tokens_per_second
+        for i, token in enumerate(tokens):
+            time.sleep(delay)
+            # Usage rides on the last chunk, as with the OpenAI stream.
+            chunk = ChatGenerationChunk(message=AIMessageChunk(
+                content=token, usage_metadata=usage if i == len(tokens) - 1 else None,
+            ))
+            if run_manager:
+                run_manager.on_llm_new_token(token, chunk=chunk)
+            yield chunk
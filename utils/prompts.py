@@ -0,0 +1,11 @@
+"""Prompts used by the Mini Project Builder, Career Tools and Ethics & Bias Detector (templates: see utils.templates)."""
+
+LINKEDIN_BIO_TEMPLATE = "Generate a compelling LinkedIn 'About' section for a [Role]. Key skills to highlight are: [Skills]. The desired tone is [Tone]. The bio should be 3 paragraphs long, engaging, and end with a call-to-action to connect."
+
+DOCSTRING_TEMPLATE = "Act as a senior Python developer. Generate a professional Google-style docstring for the following Python function. The docstring should include a summary, arguments (Args), and what it returns (Returns).\n\nFunction:\n```python\n[Code]\n```"
+
+STORY_IDEAS_TEMPLATE = "Generate three unique and intriguing short story ideas. Each idea should be a single paragraph. The story must be in the [Genre] genre, feature a [Character] as the main character, and take place in a setting like [Setting]."
+
+ETHICS_SYSTEM_PROMPT = """You are an AI ethics and bias detection assistant. Review the user's prompt or generated text for potential ethical concerns, including but not limited to: bias (gender, race, age, etc.), harmful stereotypes, hate speech, privacy violations, and misinformation. Provide a brief analysis highlighting any potential issues and suggest ways to mitigate them. If the text appears ethically sound, state that clearly."""
+
+INTERVIEW_FEEDBACK_TEMPLATE = "Provide constructive feedback on the following interview answer to the question: '[Question]'. The answer is: '[Answer]'. Focus on clarity, conciseness, and relevance. Suggest improvements if necessary."
@@ -0,0 +1,38 @@
+"""Who an LLM call is made for: the page and the browser session.
+
+Both live in context variables set once per script run by `set_page`, so they follow
+work handed to other threads through copied contexts (the Playground fan-out, chain
+steps, LangChain's batch executors). Telemetry groups calls by page; the request
+scheduler queues them fairly by session.
+"""
+import contextvars
+
+_page = contextvars.ContextVar("llm_page", default=None)
+_session = contextvars.ContextVar("llm_session", default=None)
+
+
+def _streamlit_session():
+    try:
+        from streamlit.runtime.scriptrunner import get_script_run_ctx
+        ctx = get_script_run_ctx(suppress_warning=True)
+    except Exception:
+        # Not running under Streamlit (e.g. a script or background thread).
+        return None
+    return getattr(ctx, "session_id", None)
+
+
+def set_page(name, session=None):
+    """Attribute LLM calls made from this context (and contexts copied from it) to `name`.
+
+    `session` defaults to the current Streamlit session; scripts pass their own.
+    """
+    _page.set(name)
+    _session.set(session or _streamlit_session())
+
+
+def current_page():
+    return _page.get()
+
+
+def current_session():
+    return _session.get() or _streamlit_session()
@@ -0,0 +1,223 @@
+"""Rate-limit-aware scheduling of LLM requests.
+
+Every client built by utils.llm waits here before each request. Each provider model
+gets two token buckets: requests per minute, and tokens per minute. Requests take one
+request token up front. Tokens are charged after the call from the usage the provider
+reports, so a model that has spent its token budget makes later callers wait until the
+bucket refills. Waiting requests are served in weighted-fair order across sessions
+(each session's requests get increasing virtual finish times), so one session firing a
+large batch can't starve everyone else.
+
+A 429 from the provider puts its bucket into a cooldown for Retry-After or a jittered
+exponential backoff. Every session backs off together instead of each one hammering
+the provider on its own schedule. A request that can't be admitted within
+`max_wait` raises SchedulerTimeout, which lets the client's fallback model take over.
+
+Limits come from <PROVIDER>_RPM / <PROVIDER>_TPM (e.g. OPENAI_RPM=500). Providers
+enforce them per model, so each model gets its own buckets.
+"""
+import heapq
+import itertools
+import random
+import threading
+import time
+from collections import defaultdict
+
+from utils.llm import get_secret, is_rate_limited, retry_after
+from utils.request_context import current_session
+
+DEFAULT_LIMITS = {
+    "openai": (500, 30_000),
+    "google": (360, 120_000),
+    "anthropic": (50, 40_000),
+    # Effectively unlimited, so benchmarks measure the app rather than the limiter.
+    "mock": (1_000_000, 1_000_000_000),
+}
+DEFAULT_MAX_WAIT = 60.0
+MAX_BACKOFF = 60.0
+
+
+class SchedulerTimeout(TimeoutError):
+    """Raised when a request could not be admitted within the scheduler's max_wait."""
+
+
+class TokenBucket:
+    """Refills continuously at `per_minute`, up to one minute's worth. Not thread-safe."""
+
+    def __init__(self, per_minute):
+        self.rate = per_minute / 60.0
+        self.capacity = float(per_minute)
+        self.level = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now):
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount, now):
+        """Seconds until `amount` can be taken (0 if it can be taken now)."""
+        self._refill(now)
+        if self.level >= amount:
+            return 0.0
+        return (amount - self.level) / self.rate if self.rate else float("inf")
+
+    def take(self, amount, now):
+        self._refill(now)
+        # May go negative: usage is charged after the fact and repaid by later refills.
+        self.level -= amount
+
+    def drain(self, now):
+        self._refill(now)
+        self.level = min(self.level, 0.0)
+
+
+class _ModelQueue:
+    def __init__(self, rpm, tpm):
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+        self.cooldown_until = 0.0
+        self.failures = 0
+        self.waiting = []  # heap of (virtual finish, sequence)
+        self.virtual_time = 0.0
+        self.last_finish = defaultdict(float)
+
+    def wait_time(self, now):
+        # Tokens only have to be out of debt; the request's own cost isn't known yet.
+        return max(self.cooldown_until - now, self.requests.wait_time(1, now), self.tokens.wait_time(0, now))
+
+
+class RequestScheduler:
+    def __init__(self, limits=None, max_wait=DEFAULT_MAX_WAIT):
+        self.limits = dict(DEFAULT_LIMITS, **(limits or {}))
+        self.max_wait = max_wait
+        self._queues = {}
+        self._cond = threading.Condition()
+        self._seq = itertools.count()
+
+    def _queue(self, provider, model):
+        key = (provider, model)
+        if key not in self._queues:
+            rpm, tpm = self.limits.get(provider, (60, 60_000))
+            self._queues[key] = _ModelQueue(rpm, tpm)
+        return self._queues[key]
+
+    def acquire(self, provider, model, session=None, timeout=None):
+        """Block until a request to `model` may be sent; raise SchedulerTimeout after `timeout`."""
+        session = session or current_session() or "background"
+        deadline = time.monotonic() + (self.max_wait if timeout is None else timeout)
+        with self._cond:
+            queue = self._queue(provider, model)
+            finish = max(queue.virtual_time, queue.last_finish[session]) + 1.0
+            queue.last_finish[session] = finish
+            ticket = (finish, next(self._seq))
+            heapq.heappush(queue.waiting, ticket)
+            try:
+                while True:
+                    now = time.monotonic()
+                    wait = queue.wait_time(now) if queue.waiting[0] == ticket else None
+                    if wait == 0:
+                        queue.requests.take(1, now)
+                        queue.virtual_time = finish
+                        return
+                    remaining = deadline - now
+                    if remaining <= 0:
+                        raise SchedulerTimeout(f"{provider}/{model} is over its rate limit; gave up after waiting.")
+                    self._cond.wait(remaining if wait is None else min(wait, remaining))
+            finally:
+                if ticket in queue.waiting:
+                    queue.waiting.remove(ticket)
+                    heapq.heapify(queue.waiting)
+                # The next ticket in line may be admissible now.
+                self._cond.notify_all()
+
+    def record_usage(self, provider, model, tokens):
+        with self._cond:
+            queue = self._queue(provider, model)
+            queue.tokens.take(tokens, time.monotonic())
+            queue.failures = 0
+
+    def record_error(self, provider, model, exc):
+        """Put the model into cooldown after a rate-limit error."""
+        if not is_rate_limited(exc):
+            return
+        with self._cond:
+            queue = self._queue(provider, model)
+            queue.failures += 1
+            # Full jitter, so processes throttled together don't all retry together.
+            delay = retry_after(exc) or random.uniform(0, min(MAX_BACKOFF, 2 ** queue.failures))
+            now = time.monotonic()
+            queue.cooldown_until = max(queue.cooldown_until, now + delay)
+            queue.requests.drain(now)
+            self._cond.notify_all()
+
+    def stats(self):
+        """{(provider, model): (waiting requests, seconds of cooldown left)}."""
+        now = time.monotonic()
+        with self._cond:
+            return {key: (len(q.waiting), max(0.0, q.cooldown_until - now)) for key, q in self._queues.items()}
+
+
+class SchedulerCallbacks:
+    """Per-client callbacks that feed usage and rate-limit errors back to the scheduler.
+
+    Combined with LangChain's BaseCallbackHandler in `client_hooks`.
+    """
+
+    def __init__(self, scheduler, provider, model):
+        self.scheduler, self.provider, self.model = scheduler, provider, model
+
+    def on_llm_end(self, response, **kwargs):
+        from utils.telemetry import token_usage
+        input_tokens, output_tokens = token_usage(response)
+        tokens = (input_tokens or 0) + (output_tokens or 0)
+        if tokens:
+            self.scheduler.record_usage(self.provider, self.model, tokens)
+
+    def on_llm_error(self, error, **kwargs):
+        self.scheduler.record_error(self.provider, self.model, error)
+
+
+def client_hooks(provider, model):
+    """(rate_limiter, callback handler) that tie a chat model client to the shared scheduler."""
+    from langchain_core.callbacks import BaseCallbackHandler
+    from langchain_core.rate_limiters import BaseRateLimiter
+
+    scheduler = get_scheduler()
+
+    class _RateLimiter(BaseRateLimiter):
+        def acquire(self, *, blocking=True):
+            if not blocking:
+                return False
+            scheduler.acquire(provider, model)
+            return True
+
+        async def aacquire(self, *, blocking=True):
+            import asyncio
+            if not blocking:
+                return False
+            await asyncio.to_thread(scheduler.acquire, provider, model, current_session())
+            return True
+
+    handler_class = type("SchedulerHandler", (SchedulerCallbacks, BaseCallbackHandler), {})
+    return _RateLimiter(), handler_class(scheduler, provider, model)
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler():
+    """Return the process-wide scheduler; limits from <PROVIDER>_RPM / <PROVIDER>_TPM, LLM_MAX_QUEUE_WAIT."""
+    global _scheduler
+    if _scheduler is None:
+        with _scheduler_lock:
+            if _scheduler is None:
+                limits = {
+                    provider: (
+                        int(get_secret(f"{provider.upper()}_RPM", rpm)),
+                        int(get_secret(f"{provider.upper()}_TPM", tpm)),
+                    )
+                    for provider, (rpm, tpm) in DEFAULT_LIMITS.items()
+                }
+                _scheduler = RequestScheduler(limits, float(get_secret("LLM_MAX_QUEUE_WAIT", DEFAULT_MAX_WAIT)))
+    return _scheduler
@@ -0,0 +1,173 @@
+"""Asynchronous grading of challenge submissions.
+
+Submitting only records the prompt and returns; a background thread grades
+submissions with the Prompt Coach (utils.coach) and credits the leaderboard when a
+grade comes back. The thread collects whatever arrives within a short window into one
+batch and grades it with a single `evaluate_batch` call, so a burst at challenge close
+becomes a few batched, concurrency-capped requests instead of one call per page run.
+Only one batch is in flight at a time; the queue itself is bounded overall and per
+player.
+"""
+import itertools
+import queue
+import threading
+import time
+from dataclasses import dataclass, field
+
+from utils.coach import evaluate_batch, parse_score
+from utils.leaderboard import get_leaderboard
+from utils.llm import get_llm, get_secret
+from utils.request_context import set_page
+
+SCORING_MODEL = ("openai", "gpt-4o", 0.3)  # the Prompt Coach's model, so grades match the Coach page
+MAX_FINISHED_SUBMISSIONS = 1000
+
+QUEUED = "queued"
+SCORING = "scoring"
+SCORED = "scored"
+FAILED = "failed"
+
+
+class ScoringBusy(Exception):
+    """Raised when a submission can't be queued right now."""
+
+
+@dataclass
+class Submission:
+    id: int
+    user_id: str
+    name: str
+    prompt: str
+    reward: int
+    status: str = QUEUED
+    score: float = None
+    points: int = 0
+    feedback: str = None
+    error: str = None
+    submitted_at: float = field(default_factory=time.time)
+    scored_at: float = None
+
+    @property
+    def finished(self):
+        return self.status in (SCORED, FAILED)
+
+
+def points_for(score, reward):
+    """Points for a coach score out of 10; a perfect prompt earns the full reward."""
+    return max(0, round(reward * min(score, 10.0) / 10.0))
+
+
+class ScoringQueue:
+    def __init__(self, llm_factory=None, leaderboard=None, batch_size=16, batch_wait=2.0,
+                 max_concurrency=8, max_pending=1000, max_per_user=3):
+        self._llm_factory = llm_factory or (lambda: get_llm(*SCORING_MODEL))
+        self._leaderboard = leaderboard or get_leaderboard()
+        self.batch_size = batch_size
+        self.batch_wait = batch_wait
+        self.max_concurrency = max_concurrency
+        self.max_pending = max_pending
+        self.max_per_user = max_per_user
+        self._queue = queue.Queue()
+        self._submissions = {}
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        threading.Thread(target=self._run, name="challenge-scoring", daemon=True).start()
+
+    def submit(self, user_id, name, prompt, reward):
+        """Queue a prompt for grading and return its submission id immediately."""
+        with self._lock:
+            pending = [s for s in self._submissions.values() if not s.finished]
+            if len(pending) >= self.max_pending:
+                raise ScoringBusy("Grading is backed up. Please submit again in a minute.")
+            if sum(1 for s in pending if s.user_id == user_id) >= self.max_per_user:
+                raise ScoringBusy(f"You can have at most {self.max_per_user} submissions waiting to be graded.")
+            submission = Submission(next(self._ids), user_id, name, prompt, reward)
+            self._submissions[submission.id] = submission
+        self._queue.put(submission.id)
+        return submission.id
+
+    def get(self, submission_id):
+        with self._lock:
+            return self._submissions.get(submission_id)
+
+    def for_user(self, user_id):
+        """The player's submissions, newest first."""
+        with self._lock:
+            return sorted((s for s in self._submissions.values() if s.user_id == user_id), key=lambda s: -s.id)
+
+    def pending(self):
+        with self._lock:
+            return sum(1 for s in self._submissions.values() if not s.finished)
+
+    def _next_batch(self):
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.batch_wait
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        set_page("Challenge scoring")
+        while True:
+            ids = self._next_batch()
+            with self._lock:
+                batch = {i: self._submissions[i] for i in ids}
+                for submission in batch.values():
+                    submission.status = SCORING
+            try:
+                llm = self._llm_factory()
+                results = evaluate_batch(llm, {i: s.prompt for i, s in batch.items()}, max_concurrency=self.max_concurrency)
+                for submission_id, feedback, error in results:
+                    self._finish(batch.pop(submission_id), feedback, error)
+            except Exception as e:
+                for submission in batch.values():
+                    self._finish(submission, None, f"{type(e).__name__}: {e}")
+
+    def _finish(self, submission, feedback, error):
+        score = parse_score(feedback) if feedback else None
+        if error is None and score is None:
+            error = "The grader's feedback had no overall score."
+        points = 0
+        if error is None:
+            points = points_for(score, submission.reward)
+            try:
+                self._leaderboard.add_points(submission.user_id, submission.name, points)
+            except Exception as e:
+                error = f"Could not update the leaderboard: {type(e).__name__}: {e}"
+                points = 0
+        with self._lock:
+            submission.feedback, submission.score, submission.points, submission.error = feedback, score, points, error
+            submission.status = FAILED if error else SCORED
+            submission.scored_at = time.time()
+            self._trim()
+
+    def _trim(self):
+        finished = [s.id for s in self._submissions.values() if s.finished]
+        for submission_id in finished[:max(0, len(finished) - MAX_FINISHED_SUBMISSIONS)]:
+            del self._submissions[submission_id]
+
+
+_scoring = None
+_scoring_lock = threading.Lock()
+
+
+def get_scoring_queue():
+    """Return the process-wide scoring queue, configured from SCORING_BATCH_SIZE /
+    SCORING_BATCH_WAIT / SCORING_MAX_CONCURRENCY / SCORING_MAX_PENDING."""
+    global _scoring
+    if _scoring is None:
+        with _scoring_lock:
+            if _scoring is None:
+                _scoring = ScoringQueue(
+                    batch_size=int(get_secret("SCORING_BATCH_SIZE", 16)),
+                    batch_wait=float(get_secret("SCORING_BATCH_WAIT", 2.0)),
+                    max_concurrency=int(get_secret("SCORING_MAX_CONCURRENCY", 8)),
+                    max_pending=int(get_secret("SCORING_MAX_PENDING", 1000)),
+                )
+    return _scoring
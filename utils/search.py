@@ -0,0 +1,193 @@
+"""In-memory search over prompt templates.
+
+`TemplateIndex` keeps an inverted index over title, category and prompt text and ranks
+matches with BM25 (fields weighted so title hits count most). Documents can be added
+or removed one at a time, so the index never has to be rebuilt when the library
+grows. An optional vector index over local embeddings (utils.embeddings) adds
+similarity search; it needs numpy and is skipped without it.
+"""
+import bisect
+import heapq
+import math
+import re
+import threading
+from collections import defaultdict
+
+from utils.embeddings import EMBEDDING_DIM, embed
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - numpy ships with pandas, but stay usable without it
+    np = None
+
+FIELD_WEIGHTS = {"title": 3.0, "category": 2.0, "prompt": 1.0}
+BM25_K1 = 1.2
+BM25_B = 0.75
+# Reciprocal rank fusion constant for hybrid search.
+RRF_K = 60
+# Cap on vocabulary terms a trailing prefix may expand to.
+MAX_PREFIX_TERMS = 50
+
+STOPWORDS = frozenset(
+    "a an and are as at be by for from in is it of on or that the this to with your you".split()
+)
+_TOKEN = re.compile(r"\w+")
+
+
+def tokenize(text):
+    return [token for token in _TOKEN.findall(text.lower()) if token not in STOPWORDS]
+
+
+class _VectorIndex:
+    def __init__(self, dim=EMBEDDING_DIM):
+        self.matrix = np.zeros((64, dim), dtype=np.float32)
+        self.ids = []
+        self.rows = {}
+
+    def add(self, doc_id, text):
+        vector = np.frombuffer(embed(text), dtype=np.float32)
+        if doc_id in self.rows:
+            self.matrix[self.rows[doc_id]] = vector
+            return
+        if len(self.ids) == len(self.matrix):
+            # Grow geometrically so adding one document stays amortized O(1).
+            self.matrix = np.concatenate([self.matrix, np.zeros_like(self.matrix)])
+        self.rows[doc_id] = len(self.ids)
+        self.matrix[len(self.ids)] = vector
+        self.ids.append(doc_id)
+
+    def remove(self, doc_id):
+        row = self.rows.pop(doc_id, None)
+        if row is None:
+            return
+        # Move the last row into the gap.
+        last = len(self.ids) - 1
+        if row != last:
+            self.matrix[row] = self.matrix[last]
+            self.ids[row] = self.ids[last]
+            self.rows[self.ids[row]] = row
+        self.ids.pop()
+
+    def search(self, query, limit):
+        if not self.ids:
+            return []
+        scores = self.matrix[:len(self.ids)] @ np.frombuffer(embed(query), dtype=np.float32)
+        limit = min(limit, len(self.ids))
+        top = np.argpartition(-scores, limit - 1)[:limit]
+        top = top[np.argsort(-scores[top])]
+        return [(self.ids[i], float(scores[i])) for i in top if scores[i] > 0]
+
+
+class TemplateIndex:
+    def __init__(self, vectors=True):
+        self._postings = defaultdict(dict)  # term -> {doc_id: weighted term frequency}
+        self._doc_terms = {}  # doc_id -> terms, for removal
+        self._lengths = {}
+        self._categories = {}
+        self._total_length = 0.0
+        self._vocabulary = []  # sorted, for prefix expansion
+        self._norms = None  # doc_id -> BM25 length normalization, rebuilt lazily after changes
+        self._vectors = _VectorIndex() if vectors and np is not None else None
+        self._lock = threading.RLock()
+
+    @property
+    def has_vectors(self):
+        return self._vectors is not None
+
+    def __len__(self):
+        return len(self._lengths)
+
+    def add(self, doc_id, title, category, prompt):
+        with self._lock:
+            if doc_id in self._lengths:
+                self.remove(doc_id)
+            frequencies = defaultdict(float)
+            for field, text in (("title", title), ("category", category), ("prompt", prompt)):
+                for term in tokenize(text):
+                    frequencies[term] += FIELD_WEIGHTS[field]
+            for term, frequency in frequencies.items():
+                if term not in self._postings:
+                    bisect.insort(self._vocabulary, term)
+                self._postings[term][doc_id] = frequency
+            length = sum(frequencies.values())
+            self._doc_terms[doc_id] = list(frequencies)
+            self._lengths[doc_id] = length
+            self._categories[doc_id] = category
+            self._total_length += length
+            self._norms = None
+            if self._vectors is not None:
+                self._vectors.add(doc_id, f"{title}\n{category}\n{prompt}")
+
+    def remove(self, doc_id):
+        with self._lock:
+            if doc_id not in self._lengths:
+                return
+            for term in self._doc_terms.pop(doc_id):
+                postings = self._postings[term]
+                postings.pop(doc_id, None)
+                if not postings:
+                    del self._postings[term]
+                    del self._vocabulary[bisect.bisect_left(self._vocabulary, term)]
+            self._total_length -= self._lengths.pop(doc_id)
+            self._categories.pop(doc_id)
+            self._norms = None
+            if self._vectors is not None:
+                self._vectors.remove(doc_id)
+
+    def _expand_prefix(self, prefix):
+        if prefix in self._postings:
+            return [prefix]
+        start = bisect.bisect_left(self._vocabulary, prefix)
+        terms = []
+        for term in self._vocabulary[start:start + MAX_PREFIX_TERMS]:
+            if not term.startswith(prefix):
+                break
+            terms.append(term)
+        return terms
+
+    def _bm25(self, query, category):
+        terms = tokenize(query)
+        if not terms:
+            return {}
+        # Treat the last word as a prefix so results update sensibly while typing.
+        if not query[-1:].isspace():
+            terms = terms[:-1] + (self._expand_prefix(terms[-1]) or terms[-1:])
+        n = len(self._lengths)
+        if self._norms is None:
+            average = self._total_length / n if n else 1.0
+            self._norms = {
+                doc_id: BM25_K1 * (1 - BM25_B + BM25_B * length / average) for doc_id, length in self._lengths.items()
+            }
+        norms = self._norms
+        scores = defaultdict(float)
+        for term in set(terms):
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+            weight = math.log(1 + (n - len(postings) + 0.5) / (len(postings) + 0.5)) * (BM25_K1 + 1)
+            if category:
+                categories = self._categories
+                postings = {doc_id: f for doc_id, f in postings.items() if categories[doc_id] == category}
+            for doc_id, frequency in postings.items():
+                scores[doc_id] += weight * frequency / (frequency + norms[doc_id])
+        return scores
+
+    def search(self, query, limit=50, category=None, mode="keyword"):
+        """Return `[(doc_id, score), ...]` best first. `mode` is "keyword", "semantic" or "hybrid"."""
+        with self._lock:
+            if mode == "keyword" or self._vectors is None:
+                scores = self._bm25(query, category)
+                return heapq.nlargest(limit, scores.items(), key=lambda item: item[1])
+            # Over-fetch so the category filter still leaves `limit` results.
+            semantic = [
+                (doc_id, score) for doc_id, score in self._vectors.search(query, limit * 4)
+                if not category or self._categories[doc_id] == category
+            ][:limit]
+            if mode == "semantic":
+                return semantic
+            keyword = heapq.nlargest(limit * 4, self._bm25(query, category).items(), key=lambda item: item[1])
+            fused = defaultdict(float)
+            for ranking in (keyword, semantic):
+                for rank, (doc_id, _) in enumerate(ranking):
+                    fused[doc_id] += 1.0 / (RRF_K + rank + 1)
+            return heapq.nlargest(limit, fused.items(), key=lambda item: item[1])
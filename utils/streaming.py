@@ -0,0 +1,134 @@
+"""Token streaming shared by the LLM-backed pages.
+
+`stream_llm` is plain Python and safe to call from worker threads; `render_stream`
+drives a Streamlit placeholder and must run on the script thread. Streamlit itself is
+only imported by `render_stream`, so services and scripts don't load it.
+"""
+import time
+from dataclasses import dataclass
+
+from utils.llm_cache import get_response_cache, model_settings
+
+# Minimum seconds between placeholder refreshes, so long answers don't flood the websocket.
+REFRESH_INTERVAL = 0.05
+CURSOR = " ▌"
+
+
+@dataclass
+class StreamResult:
+    text: str
+    ttft: float | None  # seconds until the first non-empty token
+    duration: float
+    cached: bool = False
+    input_tokens: int | None = None
+    output_tokens: int | None = None
+
+    @property
+    def stats(self) -> str:
+        first = f"{self.ttft:.2f}s" if self.ttft is not None else "n/a"
+        return f"⏱️ First token {first} · Total {self.duration:.2f}s" + (" · cached" if self.cached else "")
+
+
+def _chunk_text(chunk) -> str:
+    content = chunk.content
+    if isinstance(content, str):
+        return content
+    # Some providers stream a list of content parts instead of a plain string.
+    return "".join(part.get("text", "") if isinstance(part, dict) else str(part) for part in content)
+
+
+def stream_llm(llm, messages, on_token=None, cache=False, semantic=False) -> StreamResult:
+    """Stream a completion, calling `on_token(token)` for every non-empty chunk.
+
+    With `cache=True` the response cache is consulted first (near-duplicates too when
+    `semantic=True`); a hit is delivered as a single token.
+    """
+    start = time.perf_counter()
+    if cache:
+        model, temperature = model_settings(llm)
+        cached = get_response_cache().get(model, temperature, messages, semantic=semantic)
+        if cached is not None:
+            if on_token:
+                on_token(cached)
+            elapsed = time.perf_counter() - start
+            return StreamResult(cached, elapsed, elapsed, cached=True)
+    ttft = None
+    parts = []
+    usage = {}
+    for chunk in llm.stream(messages):
+        # Providers report usage on one (usually the last) chunk; sum in case it is split.
+        for name, count in (getattr(chunk, "usage_metadata", None) or {}).items():
+            if isinstance(count, int):
+                usage[name] = usage.get(name, 0) + count
+        token = _chunk_text(chunk)
+        if not token:
+            continue
+        if ttft is None:
+            ttft = time.perf_counter() - start
+        parts.append(token)
+        if on_token:
+            on_token(token)
+    result = StreamResult(
+        "".join(parts), ttft, time.perf_counter() - start,
+        input_tokens=usage.get("input_tokens"), output_tokens=usage.get("output_tokens"),
+    )
+    if cache and result.text:
+        get_response_cache().put(model, temperature, messages, result.text)
+    return result
+
+
+# --- Renderers: callables taking (placeholder, text) ---
+def as_card(css_class="response-card", pre=False, prefix=""):
+    def render(placeholder, text):
+        body = f'<pre style="white-space: pre-wrap;">{prefix}{text}</pre>' if pre else f"{prefix}{text}"
+        placeholder.markdown(f'<div class="{css_class}">{body}</div>', unsafe_allow_html=True)
+    return render
+
+
+def as_code(language=None):
+    def render(placeholder, text):
+        placeholder.code(text, language=language)
+    return render
+
+
+def as_text_area(label, height=300):
+    # Widgets can only be created once per run, so this is meant as a `final` renderer.
+    def render(placeholder, text):
+        placeholder.text_area(label, text, height=height)
+    return render
+
+
+def as_plain_text():
+    def render(placeholder, text):
+        placeholder.text(text)
+    return render
+
+
+def render_stream(llm, messages, placeholder, render=None, final=None, show_stats=True, cache=False, semantic=False) -> StreamResult:
+    """Stream `llm` into `placeholder`, then draw the finished text with `final` (defaults to `render`)."""
+    def run(on_token):
+        return stream_llm(llm, messages, on_token=on_token, cache=cache, semantic=semantic)
+    return render_tokens(run, placeholder, render=render, final=final, show_stats=show_stats)
+
+
+def render_tokens(run, placeholder, render=None, final=None, show_stats=True) -> StreamResult:
+    """Like render_stream, for any `run(on_token=...)` returning a StreamResult (e.g. a service call)."""
+    render = render or as_card()
+    final = final or render
+    parts = []
+    last_refresh = 0.0
+
+    def on_token(token):
+        nonlocal last_refresh
+        parts.append(token)
+        now = time.perf_counter()
+        if now - last_refresh >= REFRESH_INTERVAL:
+            render(placeholder, "".join(parts) + CURSOR)
+            last_refresh = now
+
+    result = run(on_token=on_token)
+    final(placeholder, result.text)
+    if show_stats:
+        import streamlit as st
+        st.caption(result.stats)
+    return result
@@ -0,0 +1,218 @@
+"""Per-call LLM telemetry.
+
+`get_telemetry_handler` returns a LangChain callback handler that utils.llm attaches to every
+client it builds, so each call is measured without the pages doing anything: latency,
+time to first token (streaming calls), prompt and completion tokens, and the error
+class if the call failed. Calls are attributed to the page named with
+utils.request_context.set_page.
+
+Records go to an in-memory ring buffer for a live view and, through a background
+writer thread, to an append-only SQLite table for the admin page's percentiles. The
+handler itself only does dict and queue operations on the calling thread, and
+langchain_core is only imported once the handler is built.
+"""
+import math
+import os
+import queue
+import sqlite3
+import threading
+import time
+from collections import deque
+from dataclasses import asdict, dataclass, fields
+
+from utils.llm import get_secret
+from utils.request_context import current_page
+
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache", "telemetry.sqlite")
+RING_SIZE = 2000
+
+# Estimated USD per million (input, output) tokens, for the spend column only.
+PRICES = {
+    "gpt-4o": (2.50, 10.00),
+    "gpt-4o-mini": (0.15, 0.60),
+    "gemini-1.5-pro-latest": (1.25, 5.00),
+    "claude-3-sonnet-20240229": (3.00, 15.00),
+}
+
+@dataclass
+class CallRecord:
+    started_at: float
+    page: str
+    provider: str
+    model: str
+    latency: float
+    ttft: float = None
+    input_tokens: int = None
+    output_tokens: int = None
+    error: str = None
+
+    @property
+    def cost(self):
+        price = PRICES.get(self.model)
+        if price is None or self.input_tokens is None:
+            return None
+        return (self.input_tokens * price[0] + (self.output_tokens or 0) * price[1]) / 1_000_000
+
+
+def token_usage(response):
+    """(input tokens, output tokens) from an LLMResult, whichever way the provider reported them."""
+    for generations in response.generations:
+        for generation in generations:
+            usage = getattr(getattr(generation, "message", None), "usage_metadata", None)
+            if usage:
+                return usage.get("input_tokens"), usage.get("output_tokens")
+    usage = (response.llm_output or {}).get("token_usage") or (response.llm_output or {}).get("usage") or {}
+    return (
+        usage.get("prompt_tokens", usage.get("input_tokens")),
+        usage.get("completion_tokens", usage.get("output_tokens")),
+    )
+
+
+class TelemetryCallbacks:
+    """Callback methods of the handler; combined with LangChain's BaseCallbackHandler on first use."""
+
+    def __init__(self, store):
+        self.store = store
+        self._runs = {}
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, metadata=None, invocation_params=None, **kwargs):
+        metadata = metadata or {}
+        params = invocation_params or {}
+        self._runs[run_id] = {
+            "started_at": time.time(),
+            "start": time.perf_counter(),
+            "ttft": None,
+            "page": current_page() or "unknown",
+            "provider": metadata.get("ls_provider") or (serialized or {}).get("id", ["?"])[-1],
+            "model": metadata.get("ls_model_name") or params.get("model_name") or params.get("model") or "unknown",
+        }
+
+    def on_llm_new_token(self, token, *, run_id, **kwargs):
+        run = self._runs.get(run_id)
+        if run is not None and run["ttft"] is None and token:
+            run["ttft"] = time.perf_counter() - run["start"]
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        run = self._runs.pop(run_id, None)
+        if run is not None:
+            self._record(run, *token_usage(response))
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        run = self._runs.pop(run_id, None)
+        if run is not None:
+            self._record(run, error=type(error).__name__)
+
+    def _record(self, run, input_tokens=None, output_tokens=None, error=None):
+        self.store.add(CallRecord(
+            run["started_at"], run["page"], run["provider"], run["model"],
+            time.perf_counter() - run["start"], run["ttft"], input_tokens, output_tokens, error,
+        ))
+
+
+class TelemetryStore:
+    def __init__(self, path=DEFAULT_PATH, ring_size=RING_SIZE):
+        self.path = path
+        self.recent = deque(maxlen=ring_size)
+        self._pending = queue.Queue()
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._lock = threading.Lock()
+        columns = ", ".join(field.name for field in fields(CallRecord))
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(f"CREATE TABLE IF NOT EXISTS llm_calls ({columns})")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_llm_calls_started ON llm_calls (started_at)")
+            self._conn.commit()
+        threading.Thread(target=self._write_loop, name="telemetry-writer", daemon=True).start()
+
+    def add(self, record):
+        self.recent.append(record)
+        self._pending.put(record)
+
+    def _write_loop(self):
+        placeholders = ", ".join("?" * len(fields(CallRecord)))
+        while True:
+            batch = [self._pending.get()]
+            while True:
+                try:
+                    batch.append(self._pending.get_nowait())
+                except queue.Empty:
+                    break
+            with self._lock:
+                self._conn.executemany(
+                    f"INSERT INTO llm_calls VALUES ({placeholders})",
+                    [tuple(asdict(record).values()) for record in batch],
+                )
+                self._conn.commit()
+
+    def load(self, since=None, limit=100_000):
+        """Most recent persisted calls (newest first), optionally only those started after `since`."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT * FROM llm_calls WHERE started_at >= ? ORDER BY started_at DESC LIMIT ?",
+                (since or 0, limit),
+            ).fetchall()
+        return [CallRecord(*row) for row in rows]
+
+
+def percentile(values, q):
+    """Nearest-rank percentile of `values` (q in 0-100), or None if there are none."""
+    values = sorted(v for v in values if v is not None)
+    if not values:
+        return None
+    return values[max(0, math.ceil(q / 100 * len(values)) - 1)]
+
+
+def summarize(records):
+    """One row per (page, model): call and error counts, latency/TTFT percentiles and token spend."""
+    groups = {}
+    for record in records:
+        groups.setdefault((record.page, record.model), []).append(record)
+    rows = []
+    for (page, model), calls in sorted(groups.items()):
+        ok = [call for call in calls if call.error is None]
+        latencies = [call.latency for call in ok]
+        costs = [call.cost for call in ok if call.cost is not None]
+        rows.append({
+            "Page": page,
+            "Model": model,
+            "Calls": len(calls),
+            "Errors": len(calls) - len(ok),
+            "p50 (s)": percentile(latencies, 50),
+            "p95 (s)": percentile(latencies, 95),
+            "p99 (s)": percentile(latencies, 99),
+            "p50 TTFT (s)": percentile([call.ttft for call in ok], 50),
+            "Input tokens": sum(call.input_tokens or 0 for call in ok),
+            "Output tokens": sum(call.output_tokens or 0 for call in ok),
+            "Est. cost ($)": sum(costs) if costs else None,
+        })
+    return rows
+
+
+_store = None
+_handler = None
+_store_lock = threading.Lock()
+
+
+def get_telemetry_store():
+    """Return the process-wide store, persisted at TELEMETRY_PATH."""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = TelemetryStore(get_secret("TELEMETRY_PATH", DEFAULT_PATH))
+    return _store
+
+
+def get_telemetry_handler():
+    """The callback handler shared by every client built in utils.llm."""
+    global _handler
+    if _handler is None:
+        store = get_telemetry_store()
+        with _store_lock:
+            if _handler is None:
+                from langchain_core.callbacks import BaseCallbackHandler
+                handler_class = type("TelemetryHandler", (TelemetryCallbacks, BaseCallbackHandler), {})
+                _handler = handler_class(store)
+    return _handler
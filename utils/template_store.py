@@ -0,0 +1,100 @@
+"""On-disk prompt template store.
+
+Templates live in SQLite so the library can grow without being held in every page
+run. Listing is paginated in SQL and returns metadata only; prompt bodies are
+fetched separately, and only for the rows actually being shown.
+"""
+import os
+import sqlite3
+import threading
+
+from utils.llm import get_secret
+
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "prompt_templates.sqlite")
+
+DEFAULT_TEMPLATES = [
+    ('Marketing', 'AIDA Copywriting Framework', 'Act as an expert copywriter. Write a product description for [Product Name] using the AIDA (Attention, Interest, Desire, Action) framework. The target audience is [Target Audience]. The key benefits are [List of Benefits].'),
+    ('Coding', 'Python Code Explainer', 'Act as a senior Python developer and code reviewer. Explain the following code snippet line by line, identify potential bugs or inefficiencies, and suggest a more optimal version.\n\n```python\n[Your Python Code Here]\n```'),
+    ('Job Search', 'Targeted Cover Letter', 'Act as a professional resume writer and career coach. Write a compelling cover letter for the role of [Job Title] at [Company Name]. My resume highlights are [Your Key Skills/Achievements]. The job description emphasizes [Key Requirements from Job Description]. Tailor the letter to show how my experience aligns perfectly with their needs.'),
+    ('Creative Writing', 'Character Backstory Generator', 'Generate a detailed character backstory for a [Genre, e.g., fantasy] novel. The character is a [Archetype, e.g., reluctant hero] named [Name]. Key traits are [Trait 1, Trait 2]. Include their childhood, a defining traumatic event, and their ultimate motivation.'),
+    ('Education', 'Lesson Plan Creator', 'Create a detailed lesson plan for a 50-minute high school class on [Subject, e.g., the water cycle]. The plan should include learning objectives, required materials, a 10-minute introductory activity, a 25-minute main explanation, and a 15-minute practical exercise or assessment.'),
+]
+
+
+class TemplateStore:
+    def __init__(self, path=DEFAULT_PATH):
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS templates (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    category TEXT NOT NULL,
+                    title TEXT NOT NULL,
+                    prompt TEXT NOT NULL
+                )""")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_templates_category ON templates (category, id)")
+            if self._conn.execute("SELECT COUNT(*) FROM templates").fetchone()[0] == 0:
+                self._conn.executemany("INSERT INTO templates (category, title, prompt) VALUES (?, ?, ?)", DEFAULT_TEMPLATES)
+            self._conn.commit()
+
+    def _query(self, sql, params=()):
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    def count(self, category=None):
+        if category:
+            return self._query("SELECT COUNT(*) FROM templates WHERE category = ?", (category,))[0][0]
+        return self._query("SELECT COUNT(*) FROM templates")[0][0]
+
+    def categories(self):
+        return [row[0] for row in self._query("SELECT DISTINCT category FROM templates ORDER BY category")]
+
+    def list_page(self, offset, limit, category=None):
+        """[(id, title, category), ...] for one page, in insertion order."""
+        if category:
+            return self._query(
+                "SELECT id, title, category FROM templates WHERE category = ? ORDER BY id LIMIT ? OFFSET ?",
+                (category, limit, offset),
+            )
+        return self._query("SELECT id, title, category FROM templates ORDER BY id LIMIT ? OFFSET ?", (limit, offset))
+
+    def get_many(self, ids):
+        """[(id, title, category), ...] for `ids`, keeping their order (e.g. search ranking)."""
+        if not ids:
+            return []
+        placeholders = ",".join("?" * len(ids))
+        rows = {row[0]: row for row in self._query(f"SELECT id, title, category FROM templates WHERE id IN ({placeholders})", ids)}
+        return [rows[i] for i in ids if i in rows]
+
+    def get_bodies(self, ids):
+        """{id: prompt} for `ids` only."""
+        if not ids:
+            return {}
+        placeholders = ",".join("?" * len(ids))
+        return dict(self._query(f"SELECT id, prompt FROM templates WHERE id IN ({placeholders})", list(ids)))
+
+    def iter_all(self, batch_size=1000):
+        """Yield (id, title, category, prompt) for every template, in batches, for index building."""
+        last_id = 0
+        while True:
+            rows = self._query(
+                "SELECT id, title, category, prompt FROM templates WHERE id > ? ORDER BY id LIMIT ?", (last_id, batch_size)
+            )
+            if not rows:
+                return
+            yield from rows
+            last_id = rows[-1][0]
+
+    def add(self, title, category, prompt):
+        with self._lock:
+            cursor = self._conn.execute("INSERT INTO templates (category, title, prompt) VALUES (?, ?, ?)", (category, title, prompt))
+            self._conn.commit()
+            return cursor.lastrowid
+
+
+def open_template_store():
+    return TemplateStore(get_secret("TEMPLATE_DB_PATH", DEFAULT_PATH))
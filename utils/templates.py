@@ -0,0 +1,73 @@
+"""Prompt templates with `[Placeholder]` markers.
+
+A template is parsed once into literal segments and placeholder slots
+(`compile_template` is memoized), after which filling it is a single join. Markers
+may carry a hint after ", e.g.", as in `[Genre, e.g., fantasy]`; the placeholder is
+then named "Genre". Markdown links (`[text](url)`) are left alone.
+"""
+import functools
+import re
+from dataclasses import dataclass
+
+_PLACEHOLDER = re.compile(r"\[([^\[\]\n]+)\](?!\()")
+_HINT = re.compile(r",\s*(e\.g\..*)$", re.IGNORECASE)
+
+
+class TemplateError(ValueError):
+    """Raised when template values are missing or don't match any placeholder."""
+
+
+@dataclass(frozen=True)
+class Placeholder:
+    name: str
+    hint: str = ""
+
+
+class CompiledTemplate:
+    def __init__(self, text):
+        self.text = text
+        self._segments = []  # literal strings and placeholder names, alternating
+        placeholders = {}
+        position = 0
+        for match in _PLACEHOLDER.finditer(text):
+            raw = match.group(1).strip()
+            hint = _HINT.search(raw)
+            name = raw[:hint.start()].strip() if hint else raw
+            placeholders.setdefault(name, Placeholder(name, hint.group(1) if hint else ""))
+            self._segments.append(text[position:match.start()])
+            self._segments.append(name)
+            position = match.end()
+        self._segments.append(text[position:])
+        self.placeholders = tuple(placeholders.values())
+
+    @property
+    def names(self):
+        return tuple(placeholder.name for placeholder in self.placeholders)
+
+    def validate(self, values):
+        missing = [name for name in self.names if not str(values.get(name, "")).strip()]
+        extra = sorted(set(values) - set(self.names))
+        if missing or extra:
+            problems = []
+            if missing:
+                problems.append(f"missing values for {', '.join(missing)}")
+            if extra:
+                problems.append(f"unknown placeholders {', '.join(extra)}")
+            raise TemplateError("Template " + " and ".join(problems) + ".")
+
+    def render(self, values=None, **kwargs):
+        """Fill every placeholder; raises TemplateError on missing or unknown names."""
+        values = {**(values or {}), **kwargs}
+        self.validate(values)
+        segments = self._segments
+        # Even positions are literals, odd positions are placeholder names.
+        return "".join(segment if i % 2 == 0 else str(values[segment]) for i, segment in enumerate(segments))
+
+
+@functools.lru_cache(maxsize=1024)
+def compile_template(text):
+    return CompiledTemplate(text)
+
+
+def render_template(text, values=None, **kwargs):
+    return compile_template(text).render(values, **kwargs)
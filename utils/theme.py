@@ -0,0 +1,61 @@
+"""Shared page styling and header layout.
+
+Every page used to re-send its own copy of a multi-KB <style> block (plus a Google
+Fonts import) on each rerun. The rules now live in static/theme.css. With static
+serving enabled (.streamlit/config.toml), a rerun only sends a <link> tag and the
+page's gradient colours; the browser fetches and caches the stylesheet once. Without
+static serving the stylesheet is inlined, read from disk once per process.
+
+Streamlit removes elements a rerun doesn't re-emit, so the tag is still sent on every
+rerun; what shrinks is its size.
+"""
+import functools
+from pathlib import Path
+
+import streamlit as st
+
+from utils.lottie import show_animation
+
+STYLESHEET = Path(__file__).resolve().parent.parent / "static" / "theme.css"
+
+
+@functools.lru_cache(maxsize=1)
+def _stylesheet_text():
+    return STYLESHEET.read_text(encoding="utf-8")
+
+
+@functools.lru_cache(maxsize=1)
+def _stylesheet_link():
+    # The modification time busts the browser cache when the stylesheet changes.
+    version = int(STYLESHEET.stat().st_mtime)
+    return f'<link rel="stylesheet" href="app/static/{STYLESHEET.name}?v={version}">'
+
+
+def _stylesheet():
+    try:
+        static = st.get_option("server.enableStaticServing")
+    except Exception:
+        static = False
+    return _stylesheet_link() if static else f"<style>{_stylesheet_text()}</style>"
+
+
+def apply_theme(gradient, duration=15, css=""):
+    """Style the page: shared stylesheet, the page's background gradient and any extra rules."""
+    page_css = f".stApp {{ --page-gradient: {gradient}; --gradient-duration: {duration}s; }}{css}"
+    st.markdown(f"{_stylesheet()}<style>{page_css}</style>", unsafe_allow_html=True)
+
+
+def page_title(title, subtitle=None):
+    st.markdown(f'<h1 class="stTitle">{title}</h1>', unsafe_allow_html=True)
+    if subtitle:
+        st.markdown(f'<p class="subtitle">{subtitle}</p>', unsafe_allow_html=True)
+
+
+def page_header(title, subtitle, animation, height=200, ratio=(0.7, 0.3)):
+    """Title and subtitle beside the page's animation; returns both columns for more content."""
+    main, side = st.columns(list(ratio))
+    with main:
+        page_title(title, subtitle)
+    with side:
+        show_animation(animation, height=height, key=f"{animation}_animation")
+    return main, side